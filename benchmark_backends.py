@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import statistics
+import pandas as pd
+
+# SQLite is the reference backend; DuckDB reads its copy at DUCKDB_PATH
+# and the Parquet backend the export in PARQUET_DIR
+os.environ['DB_TYPE'] = 'sqlite'
+
+sys.path.append(os.getcwd())
+from src.config import DUCKDB_PATH, PARQUET_DIR
+from src.db import get_engine
+from src.analytical import write_duckdb_database, run_duckdb_query, close_duckdb
+from src.columnar import run_parquet_query, close_parquet_views
+from src.queries import QUERIES
+
+PARAMS = {'year': 2023, 'quarter': 4, 'metric': 'category_amount_yoy', 'state': 'Karnataka'}
+
+def query_params(sql):
+    return {name: value for name, value in PARAMS.items() if f":{name}" in sql}
+
+def run_sqlite(sql, params):
+    return pd.read_sql(sql, get_engine(), params=params)
+
+def run_duckdb(sql, params):
+    return run_duckdb_query(sql, params)
+
+def run_parquet(sql, params):
+    return run_parquet_query(sql, params)
+
+BACKENDS = {'duckdb': run_duckdb, 'parquet': run_parquet}
+
+def build(backend):
+    """Writes the backend's copy of the SQLite database."""
+    start = time.perf_counter()
+    if backend == 'duckdb':
+        counts = write_duckdb_database(get_engine())
+        close_duckdb()
+        print(f"Built {DUCKDB_PATH} ({len(counts)} tables) in {time.perf_counter() - start:.1f} s")
+    else:
+        from src.etl import export_parquet
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            export_parquet(get_engine())
+        close_parquet_views()
+        print(f"Built {PARQUET_DIR} in {time.perf_counter() - start:.1f} s")
+
+def time_query(run, sql, params, repeat):
+    """Median wall time in milliseconds over `repeat` runs, after one warm-up."""
+    result = run(sql, params)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(sql, params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+def same_result(left, right):
+    """
+    Compares two results irrespective of row order and integer width.
+    All-NULL columns (e.g. growth_metrics.quarter for yearly metrics) come
+    back as None from SQLite and NaN from DuckDB and count as equal.
+    """
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    empty = [column for column in left.columns if left[column].isna().all() and right[column].isna().all()]
+    left, right = left.drop(columns=empty), right.drop(columns=empty)
+    left = left.sort_values(list(left.columns)).reset_index(drop=True)
+    right = right.sort_values(list(right.columns)).reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(left, right, check_dtype=False)
+    except AssertionError:
+        return False
+    return True
+
+def run(repeat=20, rebuild=False, output=None, backends=tuple(BACKENDS)):
+    for backend in backends:
+        exists = os.path.exists(DUCKDB_PATH) if backend == 'duckdb' else os.path.isdir(PARQUET_DIR)
+        if rebuild or not exists:
+            build(backend)
+
+    results = {}
+    header = ''.join(f" {backend:>10} {'speedup':>9}" for backend in backends)
+    print(f"{'query':<30} {'sqlite':>10}{header}  match")
+    for name, sql in QUERIES.items():
+        params = query_params(sql)
+        sqlite_ms, expected = time_query(run_sqlite, sql, params, repeat)
+        results[name] = {'sqlite_ms': round(sqlite_ms, 3), 'rows': len(expected), 'match': True}
+        line = f"{name:<30} {sqlite_ms:>7.2f} ms"
+        for backend in backends:
+            backend_ms, actual = time_query(BACKENDS[backend], sql, params, repeat)
+            results[name][f"{backend}_ms"] = round(backend_ms, 3)
+            results[name]['match'] &= same_result(expected, actual)
+            line += f" {backend_ms:>7.2f} ms {sqlite_ms / backend_ms:>8.2f}x"
+        print(f"{line}  {'yes' if results[name]['match'] else 'NO'}")
+
+    sqlite_total = sum(r['sqlite_ms'] for r in results.values())
+    line = f"\n{'total':<30} {sqlite_total:>7.2f} ms"
+    for backend in backends:
+        backend_total = sum(r[f"{backend}_ms"] for r in results.values())
+        line += f" {backend_total:>7.2f} ms {sqlite_total / backend_total:>8.2f}x"
+    print(line)
+
+    mismatches = [name for name, r in results.items() if not r['match']]
+    if mismatches:
+        print(f"Results differ for: {', '.join(mismatches)}")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'repeat': repeat, 'params': PARAMS, 'backends': list(backends), 'queries': results}, f, indent=2)
+        print(f"\nResults written to {output}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times every dashboard query on SQLite, DuckDB and Parquet side by side.")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query (median is reported)")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the DuckDB copy and Parquet export from SQLite first")
+    parser.add_argument('--backends', nargs='*', choices=list(BACKENDS), default=list(BACKENDS), help="Backends to compare with SQLite")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+    run(repeat=args.repeat, rebuild=args.rebuild, output=args.output, backends=args.backends)
@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.append(os.getcwd())
+from src.config import DATA_DIR
+from src.etl import JSON_BACKENDS, read_json
+
+def collect_files(limit=None):
+    """All JSON files under DATA_DIR with their sizes, largest first."""
+    files = []
+    for root, _, names in os.walk(DATA_DIR):
+        for name in names:
+            if name.endswith('.json'):
+                path = os.path.join(root, name)
+                files.append((path, os.path.getsize(path)))
+    files.sort(key=lambda f: f[1], reverse=True)
+    return files[:limit] if limit else files
+
+def benchmark_backend(decode, files, blobs):
+    """
+    Times `decode` on every file twice: on bytes already in memory (pure
+    decode cost) and through read_json (read/mmap + decode).
+    Returns per-file timings in microseconds.
+    """
+    decode_us = []
+    for raw in blobs:
+        start = time.perf_counter()
+        decode(raw)
+        decode_us.append((time.perf_counter() - start) * 1e6)
+
+    read_us = []
+    for path, _ in files:
+        start = time.perf_counter()
+        read_json(path, decode)
+        read_us.append((time.perf_counter() - start) * 1e6)
+    return decode_us, read_us
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        'total_ms': round(sum(ordered) / 1000, 2),
+        'mean_us': round(statistics.mean(ordered), 1),
+        'median_us': round(statistics.median(ordered), 1),
+        'p95_us': round(ordered[int(len(ordered) * 0.95) - 1 if len(ordered) > 1 else 0], 1),
+    }
+
+def run(limit=None, output=None):
+    files = collect_files(limit)
+    blobs = []
+    for path, _ in files:
+        with open(path, 'rb') as f:
+            blobs.append(f.read())
+    total_mb = sum(size for _, size in files) / 1e6
+    print(f"Decoding {len(files)} files ({total_mb:.1f} MB) with backends: {', '.join(JSON_BACKENDS)}")
+
+    results = {}
+    for name, decode in JSON_BACKENDS.items():
+        decode_us, read_us = benchmark_backend(decode, files, blobs)
+        results[name] = {'decode': summarize(decode_us), 'read_and_decode': summarize(read_us)}
+
+    print(f"\n{'backend':<10} {'decode total':>14} {'mean/file':>11} {'p95/file':>10} {'read+decode':>13}")
+    for name, result in results.items():
+        d, r = result['decode'], result['read_and_decode']
+        print(f"{name:<10} {d['total_ms']:>11.1f} ms {d['mean_us']:>8.1f} us {d['p95_us']:>7.1f} us {r['total_ms']:>10.1f} ms")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'files': len(files), 'megabytes': round(total_mb, 2), 'backends': results}, f, indent=2)
+        print(f"\nResults written to {output}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-file JSON decode time for each available backend.")
+    parser.add_argument('--limit', type=int, default=None, help="Only benchmark the N largest files")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+    run(limit=args.limit, output=args.output)
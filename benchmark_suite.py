@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+from datetime import datetime
+
+SECTIONS = ('extract', 'load', 'queries', 'scenarios')
+
+# Extraction functions timed one by one, in src/etl.py order
+EXTRACT_FUNCTIONS = [
+    'extract_aggregated_transaction', 'extract_aggregated_user', 'extract_aggregated_insurance',
+    'extract_aggregated_user_device', 'extract_map_transaction', 'extract_map_user',
+    'extract_map_insurance', 'extract_top_transaction', 'extract_top_user', 'extract_top_insurance',
+]
+
+class HeadlessUI:
+    """
+    Stands in for streamlit and plotly.express so the scenarios' data prep
+    runs without a UI: every call is a no-op that returns another stand-in,
+    and widgets return their default option.
+    """
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        options = list(options)
+        return options[index] if options else None
+
+    radio = selectbox
+
+    def columns(self, spec, **kwargs):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+
+    tabs = columns
+
+def headless_case_studies():
+    """Imports src.case_studies with HeadlessUI in place of streamlit and plotly."""
+    ui = HeadlessUI()
+    for name in ('streamlit', 'plotly', 'plotly.express'):
+        sys.modules[name] = ui
+    import src.case_studies
+    return src.case_studies
+
+def summarize(timings):
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'runs': len(timings),
+    }
+
+def time_call(fn, repeat=1, before=None):
+    """Times `fn` `repeat` times (calling `before` untimed ahead of each run); returns (summary, last result)."""
+    timings, result = [], None
+    for _ in range(repeat):
+        if before: before()
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings), result
+
+def bench_extract(repeat):
+    from src import etl
+    results = {}
+    for name in EXTRACT_FUNCTIONS:
+        summary, df = time_call(getattr(etl, name), repeat)
+        results[name] = dict(summary, rows=len(df))
+        print(f"  {name:<40} {summary['median_ms']:>10.1f} ms {len(df):>10} rows")
+    return results
+
+def bench_load(workers):
+    from src.config import SQLITE_DB_PATH
+    from src.db import dispose_engine
+    from src.etl import load_data_to_sql
+
+    def fresh_database():
+        dispose_engine()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(SQLITE_DB_PATH + suffix):
+                os.remove(SQLITE_DB_PATH + suffix)
+
+    results = {}
+    results['full'], _ = time_call(lambda: load_data_to_sql(workers=workers), before=fresh_database)
+    # A second, incremental run finds nothing changed: the cost of the manifest scan
+    results['incremental'], _ = time_call(lambda: load_data_to_sql(workers=workers, incremental=True))
+    results['database_mb'] = round(os.path.getsize(SQLITE_DB_PATH) / (1024 * 1024), 1)
+    for name in ('full', 'incremental'):
+        label = f"load_data_to_sql ({name})"
+        print(f"  {label:<40} {results[name]['median_ms']:>10.1f} ms")
+    return results
+
+def query_params():
+    """
+    Filter values for the parameterized queries: the latest year every
+    dataset has (so no query comes back empty), Q1 and the first state.
+    """
+    from src.db import execute_query
+    latest = [execute_query(name)['year'].max() for name in ('transaction_years', 'user_years', 'insurance_years', 'device_years')]
+    latest = [year for year in latest if year == year]
+    states = execute_query('transaction_states')['state'].tolist()
+    return {
+        'year': int(min(latest)) if latest else 0,
+        'quarter': 1,
+        'state': states[0] if states else '',
+        'metric': 'category_amount_yoy',
+    }
+
+def bench_queries(repeat):
+    from src.db import execute_query, get_table, clear_query_cache, clear_frame_store
+    from src.queries import QUERIES
+    from src.scenarios import SCENARIOS
+
+    params = query_params()
+    results = {}
+    for name, sql in QUERIES.items():
+        bound = {key: value for key, value in params.items() if f":{key}" in sql}
+        cold, df = time_call(lambda: execute_query(name, bound), repeat, before=clear_query_cache)
+        cached, _ = time_call(lambda: execute_query(name, bound), repeat)
+        results[name] = {'cold': cold, 'cached': cached, 'rows': len(df)}
+        print(f"  {name:<40} {cold['median_ms']:>8.2f} ms cold {cached['median_ms']:>7.2f} ms cached {len(df):>7} rows")
+
+    # Table slices the scenarios read through the frame store
+    for spec in SCENARIOS.values():
+        for table_name, columns, _ in spec.get('tables', []):
+            cold, df = time_call(lambda: get_table(table_name, columns, [params['year']]), repeat, before=clear_frame_store)
+            results[f"table:{table_name}"] = {'cold': cold, 'rows': len(df)}
+            print(f"  {'table:' + table_name:<40} {cold['median_ms']:>8.2f} ms cold {'':>17} {len(df):>7} rows")
+    return results
+
+def bench_scenarios(repeat):
+    from src.db import clear_query_cache, clear_frame_store
+    from src.scenarios import SCENARIOS
+    case_studies = headless_case_studies()
+
+    def clear_caches():
+        clear_query_cache()
+        clear_frame_store()
+
+    results = {}
+    for scenario_id, spec in SCENARIOS.items():
+        render = getattr(case_studies, spec['render'])
+        cold, _ = time_call(render, repeat, before=clear_caches)
+        cached, _ = time_call(render, repeat)
+        results[scenario_id] = {'cold': cold, 'cached': cached}
+        print(f"  {spec['render']:<40} {cold['median_ms']:>8.2f} ms cold {cached['median_ms']:>7.2f} ms cached")
+    return results
+
+def _medians(results, prefix=''):
+    """Flattens a results tree into {'section.name.variant': median_ms}."""
+    medians = {}
+    for key, value in results.items():
+        if not isinstance(value, dict): continue
+        if 'median_ms' in value:
+            medians[prefix + key] = value['median_ms']
+        else:
+            medians.update(_medians(value, f"{prefix}{key}."))
+    return medians
+
+def compare(current, baseline_path, threshold):
+    """
+    Prints every timing that is more than `threshold` times (and 1 ms)
+    slower than in the baseline results file. Returns the regressions.
+    """
+    with open(baseline_path) as f:
+        baseline = _medians(json.load(f)['results'])
+    regressions = []
+    for key, median in _medians(current).items():
+        before = baseline.get(key)
+        if before and median > before * threshold and median - before > 1:
+            regressions.append(key)
+            print(f"  REGRESSION {key}: {before:.2f} ms -> {median:.2f} ms ({median / before:.2f}x)")
+    if not regressions:
+        print(f"  No timing is more than {threshold}x slower than {baseline_path}.")
+    return regressions
+
+def run(sections=SECTIONS, repeat=5, workers=None, output=None, baseline=None, threshold=1.25):
+    from src.config import DATA_DIR, SQLITE_DB_PATH, DB_TYPE, ETL_WORKERS
+    workers = ETL_WORKERS if workers is None else workers
+    print(f"Data: {DATA_DIR}")
+    print(f"Database: {SQLITE_DB_PATH} ({DB_TYPE})")
+
+    results = {}
+    if 'extract' in sections:
+        print("\nExtraction (one run each):")
+        results['extract'] = bench_extract(1)
+    if 'load' in sections:
+        print(f"\nLoad ({workers or 'auto'} workers):")
+        results['load'] = bench_load(workers)
+    if 'queries' in sections:
+        print(f"\nQueries (median of {repeat}):")
+        results['queries'] = bench_queries(repeat)
+    if 'scenarios' in sections:
+        print(f"\nScenarios, headless (median of {repeat}):")
+        results['scenarios'] = bench_scenarios(repeat)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'data_dir': DATA_DIR,
+            'database': SQLITE_DB_PATH,
+            'db_type': DB_TYPE,
+            'workers': workers,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {output}")
+
+    regressions = []
+    if baseline:
+        print(f"\nCompared with {baseline}:")
+        regressions = compare(results, baseline, threshold)
+    return report, regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times extraction, loading, dashboard queries and headless scenario rendering.")
+    parser.add_argument('--data-dir', default=None, help="Pulse JSON tree to benchmark (e.g. from generate_synthetic_data.py)")
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'phonepe_benchmark.db'),
+                        help="SQLite file the benchmark loads into and queries (replaced by the load section)")
+    parser.add_argument('--sections', nargs='*', choices=SECTIONS, default=list(SECTIONS), help="Sections to run")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query and scenario (median is reported)")
+    parser.add_argument('--workers', type=int, default=None, help="ETL worker processes, 0 = one per CPU (default ETL_WORKERS)")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this path")
+    parser.add_argument('--compare', default=None, help="Results JSON of an earlier run to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    # Settings are read when src.config is imported, so set them first
+    if args.data_dir:
+        os.environ['PULSE_DATA_DIR'] = os.path.abspath(args.data_dir)
+    os.environ['SQLITE_DB_PATH'] = os.path.abspath(args.db)
+    sys.path.append(os.getcwd())
+
+    _, regressions = run(args.sections, args.repeat, args.workers, args.output, args.compare, args.threshold)
+    if regressions:
+        sys.exit(1)
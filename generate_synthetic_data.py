@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+
+sys.path.append(os.getcwd())
+from src.config import DATA_DIR
+
+# Dataset roots of the Pulse tree, relative to DATA_DIR
+CATEGORIES = ('aggregated', 'map', 'top')
+COUNTRY = 'india'
+
+# --scale presets: (state copies, year copies, pincode copies). States and
+# years multiply the number of files; pincodes multiply the rows of the top
+# pincode lists.
+PRESETS = {
+    10: (5, 2, 2),
+    100: (10, 10, 4),
+}
+
+def dataset_roots(data_dir):
+    """Every <category>/.../country/india directory under data_dir."""
+    roots = []
+    for category in CATEGORIES:
+        for root, dirs, _ in os.walk(os.path.join(data_dir, category)):
+            if os.path.basename(root) == COUNTRY and os.path.basename(os.path.dirname(root)) == 'country':
+                roots.append(os.path.relpath(root, data_dir))
+                dirs[:] = []
+    return sorted(roots)
+
+def year_span(data_dir, roots):
+    """Years covered by the tree; year copies are shifted by whole spans."""
+    years = set()
+    for root in roots:
+        base = os.path.join(data_dir, root)
+        years.update(int(name) for name in os.listdir(base) if name.isdigit())
+    return max(years) - min(years) + 1
+
+def state_slug(slug, copy):
+    # state_name() in src/etl.py turns 'karnataka-2' into 'Karnataka 2'
+    return slug if copy == 0 else f"{slug}-{copy + 1}"
+
+def scale_pincodes(data, copies):
+    """Repeats the top pincode list with distinct synthetic pincodes."""
+    pincodes = (data.get('data') or {}).get('pincodes')
+    if not pincodes or copies <= 1:
+        return data
+    # Top transaction/insurance entries name the pincode 'entityName', top user ones 'name'
+    key = 'entityName' if 'entityName' in pincodes[0] else 'name'
+    extra = []
+    for copy in range(1, copies):
+        for entry in pincodes:
+            extra.append(dict(entry, **{key: f"{entry[key]}{copy:02d}"}))
+    data['data']['pincodes'] = pincodes + extra
+    return data
+
+def write_file(source, target, pincodes):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if pincodes <= 1 or f"{os.sep}top{os.sep}" not in source:
+        shutil.copyfile(source, target)
+        return
+    with open(source) as f:
+        data = json.load(f)
+    with open(target, 'w') as f:
+        json.dump(scale_pincodes(data, pincodes), f)
+
+def copy_years(source_dir, target_dir, span, years, pincodes):
+    """Copies <year>/<quarter>.json files, adding `years - 1` shifted copies of each year."""
+    written = 0
+    for year_name in os.listdir(source_dir):
+        if not year_name.isdigit(): continue
+        for copy in range(years):
+            year = int(year_name) + copy * span
+            for file_name in os.listdir(os.path.join(source_dir, year_name)):
+                if not file_name.endswith('.json'): continue
+                write_file(
+                    os.path.join(source_dir, year_name, file_name),
+                    os.path.join(target_dir, str(year), file_name),
+                    pincodes
+                )
+                written += 1
+    return written
+
+def generate(output, states=1, years=1, pincodes=1, data_dir=DATA_DIR):
+    """
+    Writes a scaled copy of the Pulse tree under `output`: every state
+    repeated `states` times under new slugs, every year `years` times
+    (shifted past the last real year) and the top pincode lists `pincodes`
+    times. National files are scaled along years only. Returns the number
+    of files written.
+    """
+    if os.path.abspath(output) == os.path.abspath(data_dir):
+        raise ValueError("The output directory must not be the source data directory")
+    roots = dataset_roots(data_dir)
+    span = year_span(data_dir, roots)
+    written = 0
+    for root in roots:
+        source_root = os.path.join(data_dir, root)
+        target_root = os.path.join(output, root)
+        written += copy_years(source_root, target_root, span, years, pincodes)
+
+        state_dir = os.path.join(source_root, 'state')
+        if not os.path.isdir(state_dir): continue
+        for slug in sorted(os.listdir(state_dir)):
+            for copy in range(states):
+                written += copy_years(
+                    os.path.join(state_dir, slug),
+                    os.path.join(target_root, 'state', state_slug(slug, copy)),
+                    span, years, pincodes
+                )
+        print(f"{root}: {written} files so far")
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates a scaled synthetic copy of the Pulse JSON tree for benchmarks.")
+    parser.add_argument('output', help="Directory to write the synthetic tree to (use as PULSE_DATA_DIR)")
+    parser.add_argument('--scale', type=int, choices=sorted(PRESETS), default=None, help="Preset multiplier for states, years and pincodes")
+    parser.add_argument('--states', type=int, default=1, help="Copies of every state")
+    parser.add_argument('--years', type=int, default=1, help="Copies of every year")
+    parser.add_argument('--pincodes', type=int, default=1, help="Copies of every top pincode entry")
+    args = parser.parse_args()
+
+    states, years, pincodes = PRESETS[args.scale] if args.scale else (args.states, args.years, args.pincodes)
+    print(f"Scaling {DATA_DIR}: {states}x states, {years}x years, {pincodes}x pincodes -> {args.output}")
+    count = generate(args.output, states, years, pincodes)
+    print(f"Wrote {count} files.")
@@ -1,10 +1,9 @@
 import streamlit as st
-from streamlit_option_menu import option_menu
-from src.case_studies import (
-    show_scenario_1, show_scenario_2, show_scenario_3, show_scenario_4,
-    show_scenario_5, show_scenario_6, show_scenario_7, show_scenario_8, show_scenario_9
-)
-from src.db import initialize_database
+from src.scenarios import SCENARIOS, render_scenario, preload_scenarios
+
+# src.case_studies and src.db pull in pandas, plotly and SQLAlchemy. They
+# are imported on first use (after the sidebar has painted) rather than
+# here; `python profile_imports.py` shows what each import costs.
 
 # Page Config
 st.set_page_config(
@@ -32,9 +31,6 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def main():
-    # Initialize Database (Auto-create if missing)
-    initialize_database()
-    
     with st.sidebar:
         st.title("PhonePe Pulse")
         st.markdown("### Analysis Scenarios")
@@ -42,42 +38,31 @@ def main():
         
         scenario = st.radio(
             "Select Analysis:",
-            [
-                "1. Decoding Transaction Dynamics",
-                "2. Device Dominance & Engagement",
-                "3. Insurance Penetration & Growth",
-                "4. Market Expansion Strategy",
-                "5. User Engagement & Growth",
-                "6. Insurance Engagement (Uptake)",
-                "7. Top Transaction Performers",
-                "8. Top User Registration",
-                "9. Top Insurance Performers",
-            ],
+            list(SCENARIOS),
+            format_func=lambda scenario_id: SCENARIOS[scenario_id]['label'],
             index=0
         )
         
         st.divider()
         st.markdown("**About**: This dashboard provides deep insights into PhonePe's Pulse data across payments, users, and insurance.")
 
-    # Routing
-    if scenario == "1. Decoding Transaction Dynamics":
-        show_scenario_1()
-    elif scenario == "2. Device Dominance & Engagement":
-        show_scenario_2()
-    elif scenario == "3. Insurance Penetration & Growth":
-        show_scenario_3()
-    elif scenario == "4. Market Expansion Strategy":
-        show_scenario_4()
-    elif scenario == "5. User Engagement & Growth":
-        show_scenario_5()
-    elif scenario == "6. Insurance Engagement (Uptake)":
-        show_scenario_6()
-    elif scenario == "7. Top Transaction Performers":
-        show_scenario_7()
-    elif scenario == "8. Top User Registration":
-        show_scenario_8()
-    elif scenario == "9. Top Insurance Performers":
-        show_scenario_9()
+    # Initialize Database (Auto-create if missing, once per process)
+    from src.db import initialize_database, missing_backend_packages
+    missing = missing_backend_packages()
+    if missing:
+        from src.config import DB_TYPE
+        st.error(f"DB_TYPE='{DB_TYPE}' needs {', '.join(missing)} (not installed). "
+                 "Install it with `pip install -r requirements-analytics.txt`.")
+        st.stop()
+    if initialize_database():
+        st.warning("Some tables predate the current schema and were left without their indexes. "
+                   "Run `python -m src.etl` to rebuild them.")
+
+    render_scenario(scenario)
+
+    # Starts the background warm-up once per process; it waits for the app
+    # to be idle before loading the other scenarios' data
+    preload_scenarios()
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,25 @@
 import os
 import sys
+import hashlib
+import argparse
+import threading
 import urllib.parse
-import pandas as pd
-from sqlalchemy import create_engine, text
-from src.config import MYSQL_CONFIG, SQLITE_DB_PATH
+from datetime import datetime
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy import create_engine, text, inspect
+from src.config import MYSQL_CONFIG, SQLITE_DB_PATH, MIGRATION_CHUNK_SIZE, MIGRATION_WORKERS
+from src.schema import MIGRATION_PROGRESS_DEFINITION, table_definition
+
+TABLES = [
+    'aggregated_insurance', 'aggregated_transaction', 'aggregated_user',
+    'aggregated_user_device', 'map_insurance', 'map_map', 'map_user',
+    'top_insurance', 'top_map', 'top_user'
+]
+
+# SQLite allows one writer at a time: tables are read from the source
+# concurrently, but their chunks are committed one after another
+_WRITE_LOCK = threading.Lock()
 
 # 1. Database Connections
 def get_mysql_engine():
@@ -11,78 +27,203 @@ def get_mysql_engine():
     conn_str = f"mysql+pymysql://{MYSQL_CONFIG['user']}:{password}@{MYSQL_CONFIG['host']}/{MYSQL_CONFIG['database']}"
     return create_engine(conn_str)
 
+def get_source_engine(url=None):
+    """The MySQL database, or any SQLAlchemy URL (e.g. a SQLite copy for a dry run)."""
+    return create_engine(url) if url else get_mysql_engine()
+
 def get_sqlite_engine():
-    return create_engine(f"sqlite:///{SQLITE_DB_PATH}")
+    return create_engine(f"sqlite:///{SQLITE_DB_PATH}", connect_args={'timeout': 30})
+
+# 2. Progress Tracking
+def read_progress(conn, table):
+    return conn.execute(
+        text("SELECT rows_copied, chunks, completed FROM migration_progress WHERE table_name = :table"),
+        {'table': table}
+    ).first()
+
+def save_progress(conn, table, rows_copied, chunks, completed=False):
+    conn.execute(
+        text("""INSERT OR REPLACE INTO migration_progress (table_name, rows_copied, chunks, completed, updated_at)
+                VALUES (:table, :rows_copied, :chunks, :completed, :updated_at)"""),
+        {
+            'table': table, 'rows_copied': rows_copied, 'chunks': chunks, 'completed': int(completed),
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+    )
+
+# 3. Streaming Copy
+def _offset_clause(dialect):
+    """Skips the rows already committed; MySQL and SQLite need a LIMIT with OFFSET."""
+    if dialect == 'mysql':
+        return "LIMIT 18446744073709551615 OFFSET :offset"
+    if dialect == 'sqlite':
+        return "LIMIT -1 OFFSET :offset"
+    return "OFFSET :offset"
+
+def _plain(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+def migrate_table(source_engine, target_engine, table, chunk_size=MIGRATION_CHUNK_SIZE, restart=False):
+    """
+    Streams one table from the source into SQLite in chunks of `chunk_size`
+    rows. The source is read through a server-side cursor, ordered by all
+    columns so the row order is the same on every run. Each chunk is
+    inserted with executemany and committed together with the table's
+    migration_progress row, so after a failure the next run skips exactly
+    the rows already committed. This assumes the source is unchanged between
+    runs; pass restart=True to copy the table from scratch.
+    Returns the number of rows in the target table.
+    """
+    with _WRITE_LOCK, target_engine.begin() as conn:
+        progress = None if restart else read_progress(conn, table)
+        if progress is None:
+            conn.execute(text(f"DELETE FROM {table}"))
+            save_progress(conn, table, 0, 0)
+            rows_copied, chunks = 0, 0
+        elif progress.completed:
+            print(f" - {table}: already migrated ({progress.rows_copied} rows).")
+            return progress.rows_copied
+        else:
+            rows_copied, chunks = progress.rows_copied, progress.chunks
+            print(f" - {table}: resuming after {rows_copied} rows ({chunks} chunks).")
+
+    columns = [column['name'] for column in inspect(source_engine).get_columns(table)]
+    column_list = ', '.join(columns)
+    select = f"SELECT {column_list} FROM {table} ORDER BY {column_list}"
+    params = {}
+    if rows_copied:
+        select += f" {_offset_clause(source_engine.dialect.name)}"
+        params['offset'] = rows_copied
+    insert = f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' for _ in columns)})"
+
+    with source_engine.connect() as source:
+        result = source.execution_options(stream_results=True, yield_per=chunk_size).execute(text(select), params)
+        for chunk in result.partitions(chunk_size):
+            rows = [tuple(_plain(value) for value in row) for row in chunk]
+            with _WRITE_LOCK, target_engine.begin() as conn:
+                conn.exec_driver_sql(insert, rows)
+                rows_copied += len(rows)
+                chunks += 1
+                save_progress(conn, table, rows_copied, chunks)
+            print(f" - {table}: chunk {chunks} committed ({rows_copied} rows).")
+
+    with _WRITE_LOCK, target_engine.begin() as conn:
+        save_progress(conn, table, rows_copied, chunks, completed=True)
+    return rows_copied
 
-def migrate_data():
-    mysql_engine = get_mysql_engine()
+# 4. Verification
+def _normalize(value):
+    """Text form of a value that is the same whichever database returned it."""
+    if value is None:
+        return '\x00'
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (float, Decimal)):
+        value = float(value)
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+def table_checksum(engine, table, chunk_size=MIGRATION_CHUNK_SIZE):
+    """
+    Returns (row count, checksum) for a table, streamed in chunks. The
+    checksum is the sum of a 64-bit hash per row, so it does not depend on
+    row order and still counts duplicate rows.
+    """
+    columns = [column['name'] for column in inspect(engine).get_columns(table)]
+    count, checksum = 0, 0
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+            text(f"SELECT {', '.join(sorted(columns))} FROM {table}")
+        )
+        for chunk in result.partitions(chunk_size):
+            for row in chunk:
+                digest = hashlib.blake2b('\x1f'.join(_normalize(value) for value in row).encode(), digest_size=8).digest()
+                checksum = (checksum + int.from_bytes(digest, 'little')) % (1 << 64)
+            count += len(chunk)
+    return count, checksum
+
+def verify_table(source_engine, target_engine, table, checksum=True, chunk_size=MIGRATION_CHUNK_SIZE):
+    """Compares row counts (and checksums) of a table in source and target."""
+    if checksum:
+        source = table_checksum(source_engine, table, chunk_size)
+        target = table_checksum(target_engine, table, chunk_size)
+    else:
+        query = text(f"SELECT count(*) FROM {table}")
+        with source_engine.connect() as conn:
+            source = (conn.execute(query).scalar(), None)
+        with target_engine.connect() as conn:
+            target = (conn.execute(query).scalar(), None)
+
+    if source[0] != target[0]:
+        print(f" - FAILURE: {table} row count mismatch! Source: {source[0]}, SQLite: {target[0]}")
+        return False
+    if source[1] != target[1]:
+        print(f" - FAILURE: {table} checksum mismatch ({source[1]:016x} vs {target[1]:016x}), row counts match ({source[0]}).")
+        return False
+    detail = f", checksum {source[1]:016x}" if checksum else ''
+    print(f" - SUCCESS: {table} matches ({source[0]} rows{detail}).")
+    return True
+
+def migrate_data(source_url=None, tables=None, chunk_size=MIGRATION_CHUNK_SIZE, workers=MIGRATION_WORKERS,
+                 restart=False, checksum=True):
+    source_engine = get_source_engine(source_url)
     sqlite_engine = get_sqlite_engine()
-    
-    tables = [
-        'aggregated_insurance', 'aggregated_transaction', 'aggregated_user',
-        'aggregated_user_device', 'map_insurance', 'map_map', 'map_user',
-        'top_insurance', 'top_map', 'top_user'
-    ]
-    
+    tables = tables or TABLES
+
     print("starting Migration Phase 3...")
-    print(f"Source: MySQL ({MYSQL_CONFIG['database']})")
+    print(f"Source: {source_engine.dialect.name} ({source_engine.url.database})")
     print(f"Target: SQLite ({SQLITE_DB_PATH})")
-    
+    print(f"Chunks of {chunk_size} rows, {workers} tables at a time")
+
     try:
-        connection = sqlite_engine.connect()
-        # Begin transaction for safety involves ignoring constraint errors if we just append?
-        # Actually, let's just do table by table.
-        connection.close()
+        with sqlite_engine.begin() as conn:
+            conn.execute(text(MIGRATION_PROGRESS_DEFINITION))
+            for table in tables:
+                conn.execute(text(table_definition(table)))
     except Exception as e:
         print(f"CRITICAL: Cannot connect to SQLite. {e}")
         sys.exit(1)
 
-    total_tables = len(tables)
-    success_count = 0
-
-    for table in tables:
-        print(f"\n[Migrating Table: {table}]")
-        
-        # 1. Read from MySQL
-        try:
-            df = pd.read_sql(f"SELECT * FROM {table}", mysql_engine)
-            rows_mysql = len(df)
-            print(f" - Read {rows_mysql} rows from MySQL.")
-        except Exception as e:
-            print(f" - CRITICAL: Failed to read from MySQL. {e}")
-            sys.exit(1)
-
-        # 2. Write to SQLite
-        try:
-            # We clear the table first to avoid duplicates if re-running
-            with sqlite_engine.begin() as conn:
-                conn.execute(text(f"DELETE FROM {table}"))
-            
-            df.to_sql(table, sqlite_engine, if_exists='append', index=False)
-            print(f" - Wrote {len(df)} rows to SQLite.")
-            
-        except Exception as e:
-            print(f" - CRITICAL: Failed to write to SQLite. {e}")
-            sys.exit(1)
-            
-        # 3. Verify
-        try:
-             with sqlite_engine.connect() as conn:
-                 result = conn.execute(text(f"SELECT count(*) FROM {table}"))
-                 rows_sqlite = result.scalar()
-             
-             if rows_mysql == rows_sqlite:
-                 print(f" - SUCCESS: Row counts match ({rows_mysql}).")
-                 success_count += 1
-             else:
-                 print(f" - FAILURE: Row count mismatch! MySQL: {rows_mysql}, SQLite: {rows_sqlite}")
-                 sys.exit(1) # Stop immediately as per instructions
-                 
-        except Exception as e:
-            print(f" - CRITICAL: Verification failed. {e}")
-            sys.exit(1)
-
-    print(f"\nMigration Complete. {success_count}/{total_tables} tables migrated successfully.")
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(migrate_table, source_engine, sqlite_engine, table, chunk_size, restart): table
+            for table in tables
+        }
+        for future in as_completed(futures):
+            table = futures[future]
+            try:
+                rows = future.result()
+                print(f"[Migrated Table: {table}] {rows} rows")
+            except Exception as e:
+                print(f"[Migrating Table: {table}] CRITICAL: {e}")
+                failed.append(table)
+
+    if failed:
+        print(f"\nMigration stopped: {', '.join(failed)} failed. Re-run to resume from the last committed chunk.")
+        sys.exit(1)
+
+    print("\nVerifying row counts" + (" and checksums..." if checksum else "..."))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(lambda table: verify_table(source_engine, sqlite_engine, table, checksum, chunk_size), tables))
+    success_count = sum(results)
+
+    print(f"\nMigration Complete. {success_count}/{len(tables)} tables migrated successfully.")
+    if success_count != len(tables):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    migrate_data()
+    parser = argparse.ArgumentParser(description="Streams the MySQL tables into SQLite in resumable chunks.")
+    parser.add_argument('--source', default=None, help="SQLAlchemy URL of the source database (default: MYSQL_CONFIG)")
+    parser.add_argument('--tables', nargs='*', default=None, help="Only migrate these tables")
+    parser.add_argument('--chunk-size', type=int, default=MIGRATION_CHUNK_SIZE, help="Rows per chunk and commit")
+    parser.add_argument('--workers', type=int, default=MIGRATION_WORKERS, help="Tables migrated concurrently")
+    parser.add_argument('--restart', action='store_true', help="Ignore saved progress and copy every table again")
+    parser.add_argument('--no-checksum', action='store_true', help="Only compare row counts after the copy")
+    args = parser.parse_args()
+    migrate_data(
+        source_url=args.source, tables=args.tables, chunk_size=args.chunk_size,
+        workers=args.workers, restart=args.restart, checksum=not args.no_checksum
+    )
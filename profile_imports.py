@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# What the dashboard imports: main.py itself, then the scenario module and
+# the database layer it loads on the first render
+DEFAULT_MODULES = ['streamlit', 'src.db', 'src.case_studies']
+
+def parse_importtime(output):
+    """
+    Parses `python -X importtime` output into (module, depth, self_us,
+    cumulative_us) rows, in import order.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line: continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+def profile_module(module):
+    """
+    Imports `module` in a fresh interpreter with -X importtime, so nothing
+    is already cached. Returns the parsed rows, or None if the import failed.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        capture_output=True, text=True, cwd=os.getcwd()
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        print(f"{module}: import failed ({error})")
+        return None
+    return parse_importtime(result.stderr)
+
+def summarize(rows, top):
+    """
+    Total import time, self time per top-level package (where the time is
+    actually spent) and the slowest direct imports (what pulled it in).
+    """
+    packages = {}
+    for name, _, self_us, _ in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    root = rows[-1]
+    direct = [row for row in rows if row[1] == 1]
+    return {
+        'total_ms': round(root[3] / 1000, 1),
+        'packages': [
+            {'package': package, 'self_ms': round(us / 1000, 1)}
+            for package, us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]
+        ],
+        'direct_imports': [
+            {'module': name, 'cumulative_ms': round(cumulative_us / 1000, 1)}
+            for name, _, _, cumulative_us in sorted(direct, key=lambda r: r[3], reverse=True)[:top]
+        ],
+    }
+
+def run(modules, top=10, output=None):
+    report = {}
+    for module in modules:
+        rows = profile_module(module)
+        if not rows: continue
+        summary = summarize(rows, top)
+        report[module] = summary
+        print(f"\n{module}: {summary['total_ms']:.1f} ms")
+        print(f"  {'package':<28} {'self':>9}")
+        for entry in summary['packages']:
+            print(f"  {entry['package']:<28} {entry['self_ms']:>6.1f} ms")
+        print(f"  {'pulled in by':<28} {'cumulative':>9}")
+        for entry in summary['direct_imports']:
+            print(f"  {entry['module']:<28} {entry['cumulative_ms']:>6.1f} ms")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {output}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time report for the modules the dashboard loads at startup.")
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES, help="Modules to profile (each in a fresh interpreter)")
+    parser.add_argument('--top', type=int, default=10, help="Rows to show per section")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+    run(args.modules, top=args.top, output=args.output)
@@ -0,0 +1,100 @@
+import os
+import re
+import threading
+import pandas as pd
+from sqlalchemy import inspect, text
+from src.config import DUCKDB_PATH
+
+# duckdb is only needed for DB_TYPE='duckdb' (pip install duckdb)
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# ETL bookkeeping stays in SQLite only
+SKIPPED_TABLES = ('etl_manifest', 'migration_progress')
+
+# Read-only connection to the current DUCKDB_PATH file, reopened when the
+# ETL swaps in a new one
+_CONNECTION = {'conn': None, 'file_id': None}
+_CONNECTION_LOCK = threading.Lock()
+
+# :name placeholders (not :: casts) -> DuckDB's $name
+_PARAM_PATTERN = re.compile(r'(?<![:\w]):(\w+)')
+
+def _require_duckdb():
+    if duckdb is None:
+        raise ImportError("DB_TYPE='duckdb' needs duckdb: pip install duckdb")
+
+def write_duckdb_database(engine):
+    """
+    Copies every table from the SQLite database into a new DuckDB file and
+    swaps it in at DUCKDB_PATH, so dashboards never see a half-written
+    file. Returns the row count per table.
+    """
+    _require_duckdb()
+    os.makedirs(os.path.dirname(DUCKDB_PATH), exist_ok=True)
+    staging_path = DUCKDB_PATH + '.loading'
+    if os.path.exists(staging_path):
+        os.remove(staging_path)
+
+    counts = {}
+    target = duckdb.connect(staging_path)
+    try:
+        with engine.connect() as conn:
+            for table_name in inspect(conn).get_table_names():
+                if table_name in SKIPPED_TABLES: continue
+                frame = pd.read_sql(text(f"SELECT * FROM {table_name}"), conn)
+                target.register('frame', frame)
+                target.execute(f"CREATE TABLE {table_name} AS SELECT * FROM frame")
+                target.unregister('frame')
+                counts[table_name] = len(frame)
+        target.execute("CHECKPOINT")
+    finally:
+        target.close()
+    os.replace(staging_path, DUCKDB_PATH)
+    return counts
+
+def duckdb_sql(sql):
+    """Rewrites :name bind parameters as $name; the SQL is otherwise unchanged."""
+    return _PARAM_PATTERN.sub(r'$\1', sql)
+
+def _connection():
+    stat = os.stat(DUCKDB_PATH)
+    file_id = (stat.st_ino, stat.st_mtime_ns)
+    with _CONNECTION_LOCK:
+        if _CONNECTION['file_id'] != file_id:
+            if _CONNECTION['conn'] is not None:
+                _CONNECTION['conn'].close()
+            _CONNECTION.update(conn=duckdb.connect(DUCKDB_PATH, read_only=True), file_id=file_id)
+        return _CONNECTION['conn']
+
+def close_duckdb():
+    with _CONNECTION_LOCK:
+        if _CONNECTION['conn'] is not None:
+            _CONNECTION['conn'].close()
+        _CONNECTION.update(conn=None, file_id=None)
+
+def fetch_duckdb_frame(conn, sql, params=None):
+    """
+    Runs a read query on its own cursor of `conn` and returns a DataFrame,
+    so Streamlit sessions can query from their own threads. SUMs over
+    integers come back as HUGEINT and are returned as int64, the same as
+    SQLite.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(duckdb_sql(sql), params or {})
+        huge = [column[0] for column in cursor.description if str(column[1]) == 'HUGEINT']
+        df = cursor.df()
+    finally:
+        cursor.close()
+    for column in huge:
+        if not df[column].isna().any():
+            df[column] = df[column].astype('int64')
+    return df
+
+def run_duckdb_query(sql, params=None):
+    """Runs a read query against DUCKDB_PATH and returns a DataFrame."""
+    _require_duckdb()
+    return fetch_duckdb_frame(_connection(), sql, params)
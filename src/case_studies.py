@@ -1,26 +1,22 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from src.db import execute_query
+from src.db import execute_query, get_table
 
-def calculate_growth_metrics(df):
+def fetch_national(query, fallback):
     """
-    Calculates Year-over-Year growth for state-wise transaction data.
+    Reads precomputed national totals from a national_* table, falling back
+    to the state-level data when it has not been loaded yet.
     """
-    # Group by State, Year, Category
-    grouped = df.groupby(['state', 'year', 'transaction_type'])['transaction_amount'].sum().reset_index()
-    
-    # Sort to ensure shift works correctly
-    grouped = grouped.sort_values(['state', 'transaction_type', 'year'])
-    
-    # Calculate Previous Year Amount
-    grouped['prev_year_amount'] = grouped.groupby(['state', 'transaction_type'])['transaction_amount'].shift(1)
-    
-    # Calculate Growth Rate
-    # Handle division by zero or NaN
-    grouped['growth_rate'] = ((grouped['transaction_amount'] - grouped['prev_year_amount']) / grouped['prev_year_amount']) * 100
-    
-    return grouped
+    df = execute_query(query)
+    return df if not df.empty else fallback()
+
+def fetch_growth(metric, selected_year, columns):
+    """
+    Reads one year of a precomputed growth series (see GROWTH_METRICS in
+    src/etl.py), renaming its columns with `columns`.
+    """
+    return execute_query('growth_by_year', {'metric': metric, 'year': selected_year}).rename(columns=columns)
 
 def show_scenario_1():
     st.title("Scenario 1: Decoding Transaction Dynamics")
@@ -30,23 +26,17 @@ def show_scenario_1():
     """)
     
     # 1. Fetch Data
-    query = "SELECT * FROM aggregated_transaction"
-    df = execute_query(query)
+    years = sorted(execute_query('transaction_years').get('year', []))
     
-    if df.empty:
+    if not years:
         st.error("No data found!")
         return
 
-    # Data Prep
-    df['state'] = df['state'].str.title().str.replace("-", " ")
-    
     # 2. Filters
-    years = sorted(df['year'].unique())
     selected_year = st.sidebar.selectbox("Select Analysis Year", years, index=len(years)-1)
     
-    # 3. Calculate Growth
-    growth_df = calculate_growth_metrics(df)
-    current_year_growth = growth_df[growth_df['year'] == selected_year]
+    # 3. Precomputed YoY Growth
+    current_year_growth = fetch_growth('category_amount_yoy', selected_year, {'category': 'transaction_type'})
     
     # 4. Visualization: Growth Matrix (Heatmap)
     st.subheader(f"Growth Matrix: States vs Categories ({selected_year})")
@@ -71,11 +61,7 @@ def show_scenario_1():
         st.subheader("Regional Performance Highlights")
         
         # Aggregate total growth per state (weighted average approximation or total value growth)
-        state_totals = df.groupby(['state', 'year'])['transaction_amount'].sum().reset_index()
-        state_totals['prev'] = state_totals.groupby('state')['transaction_amount'].shift(1)
-        state_totals['growth'] = ((state_totals['transaction_amount'] - state_totals['prev']) / state_totals['prev']) * 100
-        
-        curr_state_growth = state_totals[state_totals['year'] == selected_year]
+        curr_state_growth = fetch_growth('state_amount_yoy', selected_year, {'value': 'transaction_amount', 'growth_rate': 'growth'})
         
         col1, col2 = st.columns(2)
         
@@ -94,9 +80,10 @@ def show_scenario_1():
         # 6. Trend Analysis (Deep Dive)
         st.divider()
         st.subheader("Deep Dive: Category Trends")
-        selected_state = st.selectbox("Select State to Investigate", df['state'].unique())
+        states = execute_query('transaction_states')['state']
+        selected_state = st.selectbox("Select State to Investigate", states)
         
-        state_data = df[df['state'] == selected_state]
+        state_data = execute_query('state_category_trend', {'state': selected_state})
         state_data['period'] = state_data['year'].astype(str) + "-Q" + state_data['quarter'].astype(str)
         
         fig_trend = px.line(state_data, x='period', y='transaction_amount', color='transaction_type',
@@ -116,32 +103,28 @@ def show_scenario_2():
     
     # 1. Fetch Data
     try:
-        df_dev = execute_query("SELECT * FROM aggregated_user_device")
-        df_user = execute_query("SELECT * FROM aggregated_user")
+        years = sorted(execute_query('device_years').get('year', []))
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return
 
-    if df_dev.empty or df_user.empty:
+    if not years:
         st.error("Missing data tables.")
         return
         
-    # Data Prep
-    df_dev['state'] = df_dev['state'].str.title().str.replace("-", " ")
-    df_user['state'] = df_user['state'].str.title().str.replace("-", " ")
-    
     # 2. Filters
-    years = sorted(df_dev['year'].unique())
     selected_year = st.sidebar.selectbox("Select Analysis Year", years, index=len(years)-1)
     
-    # Filter for selected year
-    dev_curr = df_dev[df_dev['year'] == selected_year]
-    user_curr = df_user[df_user['year'] == selected_year]
+    # Only the selected year, already summed per state (and brand)
+    state_brand = execute_query('state_brands_by_year', {'year': selected_year})
+    state_users = execute_query('state_users_by_year', {'year': selected_year})
     
     # --- Visualization 1: Brand Market Share Trends ---
     st.subheader("1. Device Brand Trends (National)")
     
-    national_trends = df_dev.groupby(['year', 'brand'])['count'].sum().reset_index()
+    # From the state-level data: the country-level device file lists only
+    # the top 10 brands plus "Others"
+    national_trends = execute_query('brand_trend_states')
     fig_trend = px.line(national_trends, x='year', y='count', color='brand', 
                         title="Growth of Device Brands Over Time", markers=True)
     st.plotly_chart(fig_trend, use_container_width=True)
@@ -151,15 +134,11 @@ def show_scenario_2():
     st.write("Does the dominant device brand in a state impact how much users engage with the app?")
     
     # 1. Find dominant brand per state
-    state_brand = dev_curr.groupby(['state', 'brand'])['count'].sum().reset_index()
-    idx = state_brand.groupby(['state'])['count'].transform(max) == state_brand['count']
+    idx = state_brand.groupby(['state'], observed=True)['count'].transform('max') == state_brand['count']
     dominant_brands = state_brand[idx].rename(columns={'brand': 'dominant_brand', 'count': 'brand_count'})
     
     # 2. Get Engagement Stats
-    df_trans = execute_query(f"SELECT state, SUM(transaction_count) as total_trans FROM aggregated_transaction WHERE year={selected_year} GROUP BY state")
-    df_trans['state'] = df_trans['state'].str.title().str.replace("-", " ")
-    
-    state_users = user_curr.groupby(['state'])['registered_users'].sum().reset_index()
+    df_trans = execute_query('state_transactions_by_year', {'year': selected_year})
     
     # Merge all
     merged = pd.merge(dominant_brands, state_users, on='state')
@@ -203,28 +182,25 @@ def show_scenario_3():
     
     # 1. Fetch Data
     try:
-        df_ins = execute_query("SELECT * FROM aggregated_insurance")
-        df_trans = execute_query("SELECT state, year, quarter, SUM(transaction_count) as total_trans FROM aggregated_transaction GROUP BY state, year, quarter")
+        years = sorted(execute_query('insurance_years').get('year', []))
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return
 
-    if df_ins.empty:
+    if not years:
         st.error("No insurance data found.")
         return
         
-    # Data Prep
-    df_ins['state'] = df_ins['state'].str.title().str.replace("-", " ")
-    df_trans['state'] = df_trans['state'].str.title().str.replace("-", " ")
-    
     # 2. Filters
-    years = sorted(df_ins['year'].unique())
     selected_year = st.sidebar.selectbox("Select Analysis Year", years, index=len(years)-1)
     
     # --- Visualization 1: Growth Trajectory ---
     st.subheader("1. Insurance Growth Trajectory")
     
-    national_growth = df_ins.groupby(['year', 'quarter'])['insurance_count'].sum().reset_index()
+    national_growth = fetch_national(
+        'insurance_trend',
+        lambda: execute_query('insurance_trend_rollup')
+    )
     national_growth['period'] = national_growth['year'].astype(str) + "-Q" + national_growth['quarter'].astype(str)
     
     fig_line = px.line(national_growth, x='period', y='insurance_count', markers=True,
@@ -234,8 +210,8 @@ def show_scenario_3():
     # --- Visualization 2: Opportunity Matrix ---
     st.subheader(f"2. Opportunity Matrix: Transactions vs Insurance ({selected_year})")
     
-    ins_curr = df_ins[df_ins['year'] == selected_year].groupby('state')['insurance_count'].sum().reset_index()
-    trans_curr = df_trans[df_trans['year'] == selected_year].groupby('state')['total_trans'].sum().reset_index()
+    ins_curr = execute_query('state_insurance_by_year', {'year': selected_year})
+    trans_curr = execute_query('state_transactions_by_year', {'year': selected_year})
     
     opp_df = pd.merge(ins_curr, trans_curr, on='state')
     opp_df['penetration_per_1k_trans'] = (opp_df['insurance_count'] / opp_df['total_trans']) * 1000
@@ -277,40 +253,29 @@ def show_scenario_4():
     """)
     
     try:
-        query = """
-            SELECT state, year, quarter, SUM(transaction_amount) as total_val, SUM(transaction_count) as total_vol 
-            FROM aggregated_transaction 
-            GROUP BY state, year, quarter
-        """
-        df = execute_query(query)
-        df_cat = execute_query("SELECT state, year, transaction_type, SUM(transaction_amount) as amount FROM aggregated_transaction GROUP BY state, year, transaction_type")
-        df_dist = execute_query("SELECT state, district, year, SUM(total_transactions) as total_vol FROM map_map GROUP BY state, district, year")
-        
+        years = sorted(execute_query('transaction_years').get('year', []))
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return
     
-    if df.empty:
+    if not years:
         st.error("No transaction data found.")
         return
 
-    df['state'] = df['state'].str.title().str.replace("-", " ")
-    if not df_cat.empty:
-        df_cat['state'] = df_cat['state'].str.title().str.replace("-", " ")
-    if not df_dist.empty:
-        df_dist['state'] = df_dist['state'].str.title().str.replace("-", " ")
-        df_dist['district'] = df_dist['district'].str.title()
-    
-    years = sorted(df['year'].unique())
     selected_year = st.sidebar.selectbox("Select Analysis Year", years, index=len(years)-1)
-    df_curr = df[df['year'] == selected_year]
+    
+    # Only the selected year's rollup rows and the columns used, from the shared frame store
+    df_curr = get_table('rollup_transaction_state_quarter', ['state', 'year', 'quarter', 'transaction_count'], [selected_year]).rename(columns={'transaction_count': 'total_vol'})
+    df_dist = get_table('rollup_transaction_district_year', ['state', 'district', 'year', 'transaction_count'], [selected_year]).rename(columns={'transaction_count': 'total_vol'})
+    df_cat = execute_query('category_mix')
     
     st.subheader(f"1. Market Maturity Matrix ({selected_year})")
-    market_size = df_curr.groupby('state')['total_vol'].sum().reset_index()
-    df = df.sort_values(['state', 'year', 'quarter'])
-    df['prev_vol'] = df.groupby('state')['total_vol'].shift(1)
-    df['qoq_growth'] = ((df['total_vol'] - df['prev_vol']) / df['prev_vol']) * 100
-    avg_growth = df[df['year'] == selected_year].groupby('state')['qoq_growth'].mean().reset_index()
+    market_size = df_curr.groupby('state', observed=True)['total_vol'].sum().reset_index()
+    qoq = fetch_growth('state_count_qoq', selected_year, {'growth_rate': 'qoq_growth'})
+    if qoq.empty:
+        st.warning("Growth metrics not available. Re-run the ETL to compute them.")
+        return
+    avg_growth = qoq.groupby('state', observed=True)['qoq_growth'].mean().reset_index()
     matrix_df = pd.merge(market_size, avg_growth, on='state')
     
     median_vol = matrix_df['total_vol'].median()
@@ -337,7 +302,7 @@ def show_scenario_4():
     st.subheader("2. Category Gap Analysis")
     cat_curr = df_cat[df_cat['year'] == selected_year] if not df_cat.empty else pd.DataFrame()
     if not cat_curr.empty:
-        state_sums = cat_curr.groupby('state')['amount'].transform('sum')
+        state_sums = cat_curr.groupby('state', observed=True)['amount'].transform('sum')
         cat_curr['percent'] = (cat_curr['amount'] / state_sums) * 100
         fig_norm = px.bar(cat_curr, x='state', y='percent', color='transaction_type', title="Payment Mix % by State", labels={'percent': 'Share of Total Value (%)'})
         st.plotly_chart(fig_norm, use_container_width=True)
@@ -367,28 +332,28 @@ def show_scenario_5():
     """)
     
     try:
-        df_user = execute_query("SELECT * FROM aggregated_user")
+        years = sorted(execute_query('user_years').get('year', []))
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return
         
-    if df_user.empty:
+    if not years:
         st.error("No user data found.")
         return
 
-    df_user['state'] = df_user['state'].str.title().str.replace("-", " ")
-    years = sorted(df_user['year'].unique())
     selected_year = st.sidebar.selectbox("Select Analysis Year", years, index=len(years)-1)
-    user_curr = df_user[df_user['year'] == selected_year]
     
     st.subheader("1. User Registration Growth")
-    growth_trend = df_user.groupby(['year', 'quarter'])['registered_users'].sum().reset_index()
+    growth_trend = fetch_national(
+        'user_trend',
+        lambda: execute_query('user_trend_rollup')
+    )
     growth_trend['period'] = growth_trend['year'].astype(str) + "-Q" + growth_trend['quarter'].astype(str)
     fig_line = px.line(growth_trend, x='period', y='registered_users', markers=True, title="Total Registered Users Over Time")
     st.plotly_chart(fig_line, use_container_width=True)
     
     st.subheader(f"2. Engagement Rate: App Opens vs Registrations ({selected_year})")
-    state_eng = user_curr.groupby('state')[['registered_users', 'app_opens']].sum().reset_index()
+    state_eng = execute_query('state_users_by_year', {'year': selected_year})
     if state_eng['app_opens'].sum() == 0:
         st.warning("App Opens data might be missing for this year.")
     state_eng['engagement_rate'] = state_eng['app_opens'] / state_eng['registered_users']
@@ -398,8 +363,7 @@ def show_scenario_5():
     
     st.subheader("3. Top Districts by Registered Users")
     try:
-        df_dist_user = execute_query(f"SELECT state, district, SUM(registered_users) as users FROM map_user WHERE year={selected_year} GROUP BY state, district")
-        df_dist_user['district'] = df_dist_user['district'].str.title()
+        df_dist_user = execute_query('district_users_by_year', {'year': selected_year})
         top_districts = df_dist_user.nlargest(10, 'users')
         if not top_districts.empty:
             fig_dist = px.bar(top_districts, x='users', y='district', color='state', orientation='h', title="Top 10 Districts by Registered Users")
@@ -415,22 +379,19 @@ def show_scenario_6():
     """)
     
     try:
-        df_ins = execute_query("SELECT * FROM aggregated_insurance")
+        years = sorted(execute_query('insurance_years').get('year', []))
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return
         
-    if df_ins.empty:
+    if not years:
         st.error("No insurance data found.")
         return
 
-    df_ins['state'] = df_ins['state'].str.title().str.replace("-", " ")
-    years = sorted(df_ins['year'].unique())
     selected_year = st.sidebar.selectbox("Select Analysis Year", years, index=len(years)-1)
-    ins_curr = df_ins[df_ins['year'] == selected_year]
     
     st.subheader(f"1. Average Premium Size by State ({selected_year})")
-    state_prem = ins_curr.groupby('state')[['insurance_count', 'insurance_amount']].sum().reset_index()
+    state_prem = execute_query('state_insurance_by_year', {'year': selected_year})
     state_prem['avg_premium'] = state_prem['insurance_amount'] / state_prem['insurance_count']
     state_prem = state_prem.sort_values('avg_premium', ascending=False)
     fig_bar = px.bar(state_prem, x='state', y='avg_premium', color='avg_premium', title="Average Premium Value (₹) by State", labels={'avg_premium': 'Avg Premium (₹)'})
@@ -445,27 +406,24 @@ def show_scenario_7():
     st.markdown("**Goal**: Identify Top States, Districts, and Pincodes by Transaction Volume for a specific Year & Quarter.")
     
     try:
-        years = execute_query("SELECT DISTINCT year FROM aggregated_transaction ORDER BY year DESC")['year'].tolist()
+        years = execute_query('transaction_years')['year'].tolist()
         selected_year = st.sidebar.selectbox("Select Year", years)
         selected_quarter = st.sidebar.selectbox("Select Quarter", [1, 2, 3, 4])
     except:
         st.error("Error fetching years.")
         return
 
+    params = {'year': selected_year, 'quarter': selected_quarter}
     st.subheader(f"1. Top 10 States (Transactions) - Q{selected_quarter} {selected_year}")
-    q_state = f"SELECT state, SUM(transaction_count) as count, SUM(transaction_amount) as amount FROM aggregated_transaction WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY state ORDER BY count DESC LIMIT 10"
-    df_state = execute_query(q_state)
+    df_state = execute_query('top_states_transaction', params)
     if not df_state.empty:
-        df_state['state'] = df_state['state'].str.title().str.replace("-", " ")
         fig_s = px.bar(df_state, x='count', y='state', orientation='h', title="Top States by Volume", color='amount')
         st.plotly_chart(fig_s, use_container_width=True)
         
     st.subheader("2. Top 10 Districts (Transactions)")
     try:
-        q_dist = f"SELECT district, state, SUM(total_transactions) as count FROM map_map WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY district, state ORDER BY count DESC LIMIT 10"
-        df_dist = execute_query(q_dist)
+        df_dist = execute_query('top_districts_transaction', params)
         if not df_dist.empty:
-            df_dist['district'] = df_dist['district'].str.title()
             fig_d = px.bar(df_dist, x='count', y='district', color='state', orientation='h', title="Top Districts by Volume")
             st.plotly_chart(fig_d, use_container_width=True)
     except:
@@ -473,8 +431,7 @@ def show_scenario_7():
         
     st.subheader("3. Top 10 Pincodes (Transactions)")
     try:
-        q_pin = f"SELECT pincode, state, SUM(transaction_count) as count FROM top_map WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY pincode, state ORDER BY count DESC LIMIT 10"
-        df_pin = execute_query(q_pin)
+        df_pin = execute_query('top_pincodes_transaction', params)
         if not df_pin.empty: st.table(df_pin)
     except:
         st.warning("Pincode data unavailable.")
@@ -484,25 +441,22 @@ def show_scenario_8():
     st.markdown("**Goal**: Identify Top Regions for New User Registrations.")
     
     try:
-        years = execute_query("SELECT DISTINCT year FROM aggregated_user ORDER BY year DESC")['year'].tolist()
+        years = execute_query('user_years')['year'].tolist()
         selected_year = st.sidebar.selectbox("Select Year", years)
         selected_quarter = st.sidebar.selectbox("Select Quarter", [1, 2, 3, 4])
     except: return
 
+    params = {'year': selected_year, 'quarter': selected_quarter}
     st.subheader(f"1. Top 10 States (Registrations) - Q{selected_quarter} {selected_year}")
-    q_state = f"SELECT state, SUM(registered_users) as users FROM aggregated_user WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY state ORDER BY users DESC LIMIT 10"
-    df_state = execute_query(q_state)
+    df_state = execute_query('top_states_user', params)
     if not df_state.empty:
-        df_state['state'] = df_state['state'].str.title().str.replace("-", " ")
         fig_s = px.bar(df_state, x='users', y='state', orientation='h', title="Top States by Registered Users")
         st.plotly_chart(fig_s, use_container_width=True)
         
     st.subheader("2. Top 10 Districts (Registrations)")
     try:
-        q_dist = f"SELECT district, state, SUM(registered_users) as users FROM map_user WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY district, state ORDER BY users DESC LIMIT 10"
-        df_dist = execute_query(q_dist)
+        df_dist = execute_query('top_districts_user', params)
         if not df_dist.empty:
-            df_dist['district'] = df_dist['district'].str.title()
             fig_d = px.bar(df_dist, x='users', y='district', color='state', orientation='h', title="Top Districts by Registered Users")
             st.plotly_chart(fig_d, use_container_width=True)
     except:
@@ -510,8 +464,7 @@ def show_scenario_8():
         
     st.subheader("3. Top 10 Pincodes (Registrations)")
     try:
-        q_pin = f"SELECT pincode, state, SUM(registered_users) as users FROM top_user WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY pincode, state ORDER BY users DESC LIMIT 10"
-        df_pin = execute_query(q_pin)
+        df_pin = execute_query('top_pincodes_user', params)
         if not df_pin.empty: st.table(df_pin)
     except:
         st.warning("Pincode data not found.")
@@ -521,27 +474,24 @@ def show_scenario_9():
     st.markdown("**Goal**: Identify Top Regions for Insurance Sales.")
     
     try:
-        years = execute_query("SELECT DISTINCT year FROM aggregated_insurance ORDER BY year DESC")['year'].tolist()
+        years = execute_query('insurance_years')['year'].tolist()
         selected_year = st.sidebar.selectbox("Select Year", years)
         selected_quarter = st.sidebar.selectbox("Select Quarter", [1, 2, 3, 4])
     except:
         st.error("Error fetching years.")
         return
 
+    params = {'year': selected_year, 'quarter': selected_quarter}
     st.subheader(f"1. Top 10 States (Policies Sold) - Q{selected_quarter} {selected_year}")
-    q_state = f"SELECT state, SUM(insurance_count) as count FROM aggregated_insurance WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY state ORDER BY count DESC LIMIT 10"
-    df_state = execute_query(q_state)
+    df_state = execute_query('top_states_insurance', params)
     if not df_state.empty:
-        df_state['state'] = df_state['state'].str.title().str.replace("-", " ")
         fig_s = px.bar(df_state, x='count', y='state', orientation='h', title="Top States by Policies Sold")
         st.plotly_chart(fig_s, use_container_width=True)
         
     st.subheader("2. Top 10 Districts (Policies Sold)")
     try:
-        q_dist = f"SELECT district, state, SUM(insurance_count) as count FROM map_insurance WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY district, state ORDER BY count DESC LIMIT 10"
-        df_dist = execute_query(q_dist)
+        df_dist = execute_query('top_districts_insurance', params)
         if not df_dist.empty:
-            df_dist['district'] = df_dist['district'].str.title()
             fig_d = px.bar(df_dist, x='count', y='district', color='state', orientation='h', title="Top Districts by Policies Sold")
             st.plotly_chart(fig_d, use_container_width=True)
     except:
@@ -549,8 +499,7 @@ def show_scenario_9():
         
     st.subheader("3. Top 10 Pincodes (Policies Sold)")
     try:
-        q_pin = f"SELECT pincode, state, SUM(insurance_count) as count FROM top_insurance WHERE year={selected_year} AND quarter={selected_quarter} GROUP BY pincode, state ORDER BY count DESC LIMIT 10"
-        df_pin = execute_query(q_pin)
+        df_pin = execute_query('top_pincodes_insurance', params)
         if not df_pin.empty: st.table(df_pin)
     except:
         st.warning("Pincode data unavailable.")
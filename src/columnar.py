@@ -0,0 +1,138 @@
+import os
+import shutil
+import threading
+import pandas as pd
+from sqlalchemy import text
+from src.config import PARQUET_DIR
+from src.analytical import duckdb, fetch_duckdb_frame
+
+# pyarrow is only needed for DB_TYPE='parquet' (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+# Tables whose quarter column is NULL for some rows (yearly growth
+# metrics) are partitioned by year only
+YEAR_PARTITIONED = ('growth_metrics',)
+
+# In-memory DuckDB connection with one view per exported table, rebuilt
+# when the set of exported tables changes
+_VIEWS = {'conn': None, 'tables': None}
+_VIEWS_LOCK = threading.Lock()
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("DB_TYPE='parquet' needs pyarrow: pip install pyarrow")
+
+def _require_duckdb():
+    if duckdb is None:
+        raise ImportError("DB_TYPE='parquet' runs its queries with duckdb: pip install duckdb")
+
+def table_dir(table_name):
+    return os.path.join(PARQUET_DIR, table_name)
+
+def partition_columns(columns, table_name=None):
+    """Hive partition columns for a table: year/quarter, or just year."""
+    keys = ('year',) if table_name in YEAR_PARTITIONED else ('year', 'quarter')
+    return [column for column in keys if column in columns]
+
+def _partition_dir(table_name, partition):
+    return os.path.join(table_dir(table_name), *(f"{column}={value}" for column, value in partition))
+
+def write_parquet_table(engine, table_name, partitions=None):
+    """
+    Exports a table from the database to PARQUET_DIR/<table>/year=Y/quarter=Q.
+    `partitions` is an iterable of partition tuples ((column, value), ...)
+    whose data changed; they are projected onto the table's partition
+    columns and only those directories are rewritten. Without it the whole
+    table is rewritten. Returns the number of rows written.
+    """
+    _require_pyarrow()
+    with engine.connect() as conn:
+        columns = list(pd.read_sql(text(f"SELECT * FROM {table_name} LIMIT 0"), conn).columns)
+        partition_cols = partition_columns(columns, table_name)
+
+        if partitions is None:
+            shutil.rmtree(table_dir(table_name), ignore_errors=True)
+            df = pd.read_sql(text(f"SELECT * FROM {table_name}"), conn)
+        else:
+            targets = {tuple((c, v) for c, v in partition if c in partition_cols) for partition in partitions}
+            if not targets: return 0
+            for target in targets:
+                shutil.rmtree(_partition_dir(table_name, target), ignore_errors=True)
+            where = ' AND '.join(f"{column} = :{column}" for column in partition_cols)
+            df = pd.concat(
+                [pd.read_sql(text(f"SELECT * FROM {table_name} WHERE {where}"), conn, params=dict(target)) for target in targets],
+                ignore_index=True
+            )
+
+    if df.empty: return 0
+    pq.write_to_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        table_dir(table_name),
+        partition_cols=partition_cols,
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+    )
+    return len(df)
+
+def read_parquet_table(table_name, columns=None, years=None, quarters=None):
+    """
+    Reads a table back from PARQUET_DIR. Only `columns` are decoded
+    (projection) and only the year=.../quarter=... partitions in `years`
+    and `quarters` are opened (partition pruning); files are memory-mapped.
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(
+        table_dir(table_name), format='parquet', partitioning='hive',
+        filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+    row_filter = None
+    for column, values in (('year', years), ('quarter', quarters)):
+        if values:
+            condition = ds.field(column).isin([int(value) for value in values])
+            row_filter = condition if row_filter is None else row_filter & condition
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+def exported_tables():
+    if not os.path.isdir(PARQUET_DIR):
+        return ()
+    return tuple(sorted(name for name in os.listdir(PARQUET_DIR) if os.path.isdir(table_dir(name))))
+
+def _view_connection():
+    tables = exported_tables()
+    with _VIEWS_LOCK:
+        if _VIEWS['tables'] != tables:
+            if _VIEWS['conn'] is not None:
+                _VIEWS['conn'].close()
+            conn = duckdb.connect()
+            for table_name in tables:
+                files = os.path.join(table_dir(table_name), '**', '*.parquet').replace("'", "''")
+                conn.execute(
+                    f"CREATE VIEW {table_name} AS "
+                    f"SELECT * FROM read_parquet('{files}', hive_partitioning = true)"
+                )
+            _VIEWS.update(conn=conn, tables=tables)
+        return _VIEWS['conn']
+
+def run_parquet_query(sql, params=None):
+    """
+    Runs a read query over the Parquet export and returns a DataFrame. Each
+    exported table is a DuckDB view over its files, so the named queries
+    run unchanged; DuckDB skips the year=/quarter= directories their WHERE
+    clauses rule out and decodes only the columns they select. The files
+    are listed on every query, so partitions the ETL rewrites are picked up.
+    """
+    _require_pyarrow()
+    _require_duckdb()
+    return fetch_duckdb_frame(_view_connection(), sql, params)
+
+def close_parquet_views():
+    with _VIEWS_LOCK:
+        if _VIEWS['conn'] is not None:
+            _VIEWS['conn'].close()
+        _VIEWS.update(conn=None, tables=None)
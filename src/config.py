@@ -2,7 +2,12 @@ import os
 
 # Database Configuration
 # Database Configuration
-DB_TYPE = os.getenv('DB_TYPE', 'sqlite') # Options: 'sqlite', 'mysql'
+DB_TYPE = os.getenv('DB_TYPE', 'sqlite') # Options: 'sqlite', 'mysql', 'parquet', 'duckdb'
+# 'parquet' keeps SQLite for the ETL and its bookkeeping, and also writes
+# the fact, rollup and growth tables as partitioned Parquet (PARQUET_DIR)
+# that the dashboard queries and table reads are served from.
+# 'duckdb' also loads into SQLite, then copies every table into a DuckDB
+# file (DUCKDB_PATH) that all dashboard queries run on.
 
 # MySQL Config (Legacy/Migration Source)
 MYSQL_CONFIG = {
@@ -13,11 +18,72 @@ MYSQL_CONFIG = {
 }
 
 # SQLite Config (New Target)
-SQLITE_DB_PATH = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data')), 'phonepe.db')
+SQLITE_DB_PATH = os.getenv('SQLITE_DB_PATH', os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data')), 'phonepe.db'))
+
+# Connection pool (one engine per process, shared by all Streamlit sessions)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+
+# SQLite performance profile, applied to every new connection.
+# WAL lets dashboard readers keep reading while the ETL writes; cache_size is
+# negative to mean KiB rather than pages.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+}
+
+# Query result cache in src/db.py: memory bound (0 disables it) and how long
+# a cached result may be served. Entries are also dropped whenever an ETL
+# load bumps the data version.
+QUERY_CACHE_MB = int(os.getenv('QUERY_CACHE_MB', 256))
+QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', 600))
+# Seconds between data version reads: cache hits in between are served
+# without touching the database, and a load by another process is seen
+# within this interval
+DATA_VERSION_CHECK_SECONDS = float(os.getenv('DATA_VERSION_CHECK_SECONDS', 2))
+# Shared frame store in src/db.py (get_table): memory bound for the stored
+# table slices, least recently used evicted first (0 disables storing)
+FRAME_STORE_MB = int(os.getenv('FRAME_STORE_MB', 512))
+
+# Scenario preloading (src/scenarios.py): once no page has rendered for
+# SCENARIO_PRELOAD_IDLE seconds, a background thread warms the caches for
+# this many scenarios, most viewed first (0 disables it), covering this
+# many of the most recent years.
+SCENARIO_PRELOAD = int(os.getenv('SCENARIO_PRELOAD', 9))
+SCENARIO_PRELOAD_YEARS = int(os.getenv('SCENARIO_PRELOAD_YEARS', 1))
+SCENARIO_PRELOAD_IDLE = float(os.getenv('SCENARIO_PRELOAD_IDLE', 5))
+
+# MySQL -> SQLite migration (migrate_phase3.py): rows read and committed per
+# chunk, and how many tables are copied concurrently
+MIGRATION_CHUNK_SIZE = int(os.getenv('MIGRATION_CHUNK_SIZE', 50000))
+MIGRATION_WORKERS = int(os.getenv('MIGRATION_WORKERS', 4))
 
 # For backward compatibility during migration scripts
 DB_CONFIG = MYSQL_CONFIG
 
 # Data Directory
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-DATA_DIR = os.path.join(BASE_DIR, 'data')
+# Root of the Pulse JSON tree; PULSE_DATA_DIR points the ETL at another tree
+# (e.g. one made by generate_synthetic_data.py)
+DATA_DIR = os.getenv('PULSE_DATA_DIR', os.path.join(BASE_DIR, 'data'))
+# Parquet backend: one directory per table, partitioned year=/quarter=
+PARQUET_DIR = os.getenv('PARQUET_DIR', os.path.join(DATA_DIR, 'parquet'))
+# DuckDB backend: analytical copy of the SQLite database
+DUCKDB_PATH = os.getenv('DUCKDB_PATH', os.path.join(DATA_DIR, 'phonepe.duckdb'))
+
+# ETL Configuration
+# Number of worker processes used to extract the Pulse tree (1 = sequential,
+# 0 = one per CPU, sequential on a single CPU)
+ETL_WORKERS = int(os.getenv('ETL_WORKERS', 0))
+# Rows per batch and batches buffered between extractor and writer in streaming mode
+ETL_BATCH_SIZE = int(os.getenv('ETL_BATCH_SIZE', 5000))
+ETL_QUEUE_SIZE = int(os.getenv('ETL_QUEUE_SIZE', 4))
+# JSON decoder: 'auto' picks orjson, then simdjson, then the stdlib json module
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+# Files at least this many bytes are decoded through mmap instead of read()
+JSON_MMAP_THRESHOLD = int(os.getenv('JSON_MMAP_THRESHOLD', 64 * 1024))
@@ -1,53 +1,531 @@
 import os
+import time
+import threading
+import importlib.util
+from collections import OrderedDict
+from datetime import datetime
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.pool import QueuePool
 import urllib.parse
-from src.config import DB_CONFIG, DB_TYPE, SQLITE_DB_PATH, MYSQL_CONFIG
+from src.config import (
+    DB_CONFIG, DB_TYPE, SQLITE_DB_PATH, MYSQL_CONFIG,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, SQLITE_PRAGMAS,
+    QUERY_CACHE_MB, QUERY_CACHE_TTL, FRAME_STORE_MB, DATA_VERSION_CHECK_SECONDS
+)
 try:
-    from src.schema import SCHEMA_DEFINITIONS
+    from src.schema import SCHEMA_DEFINITIONS, INDEX_DEFINITIONS, DATA_VERSION_DEFINITION, DIMENSION_COLUMNS, PERIOD_COLUMNS
 except ImportError:
     SCHEMA_DEFINITIONS = []
+    INDEX_DEFINITIONS = []
+    DATA_VERSION_DEFINITION = None
+    DIMENSION_COLUMNS = set()
+    PERIOD_COLUMNS = set()
+from src.queries import QUERIES
 
-def get_engine():
-    """
-    Creates and returns a SQLAlchemy engine based on DB_TYPE.
-    """
-    if DB_TYPE == 'sqlite':
+# Cached results and stored frames are handed to sessions as shallow
+# copies, which is only safe under copy-on-write. pandas 3 always uses it;
+# older versions (1.5+) need it switched on.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Backends whose SQL side (ETL and bookkeeping) is the SQLite file
+SQLITE_BACKENDS = ('sqlite', 'parquet', 'duckdb')
+# Optional packages each backend needs (requirements-analytics.txt)
+BACKEND_PACKAGES = {
+    'duckdb': ('duckdb',),
+    'parquet': ('pyarrow', 'duckdb'),
+}
+
+# One engine (and connection pool) per DB_TYPE for the whole process
+_ENGINES = {}
+_ENGINE_LOCK = threading.Lock()
+_POOL_EVENTS = {'connects': 0, 'checkouts': 0}
+_STATEMENT_EVENTS = {'compiled': 0, 'reused': 0, 'uncached': 0}
+# DB_TYPEs whose schema this process has already tried to create
+_INITIALIZED = set()
+_SCHEMA_LOCK = threading.Lock()
+
+def _count_pool_events(engine):
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        _POOL_EVENTS['connects'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _POOL_EVENTS['checkouts'] += 1
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        # SQLAlchemy reports whether the statement came from its compiled cache
+        cache_hit = getattr(context, 'cache_hit', None)
+        if cache_hit == CACHE_HIT:
+            _STATEMENT_EVENTS['reused'] += 1
+        elif cache_hit == CACHE_MISS:
+            _STATEMENT_EVENTS['compiled'] += 1
+        else:
+            _STATEMENT_EVENTS['uncached'] += 1
+
+def _apply_sqlite_pragmas(engine):
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+def _create_engine():
+    pool_args = dict(
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if DB_TYPE in SQLITE_BACKENDS:
         # Ensure the directory exists
         os.makedirs(os.path.dirname(SQLITE_DB_PATH), exist_ok=True)
-        return create_engine(f"sqlite:///{SQLITE_DB_PATH}")
-    
+        # Streamlit serves each session from its own thread, so pooled
+        # connections must be usable from whichever thread checks them out
+        engine = create_engine(
+            f"sqlite:///{SQLITE_DB_PATH}",
+            connect_args={'check_same_thread': False},
+            **pool_args
+        )
+        _apply_sqlite_pragmas(engine)
+        return engine
+
     # Legacy MySQL Support
     password = urllib.parse.quote_plus(MYSQL_CONFIG['password'])
     conn_str = f"mysql+pymysql://{MYSQL_CONFIG['user']}:{password}@{MYSQL_CONFIG['host']}/{MYSQL_CONFIG['database']}"
-    return create_engine(conn_str)
+    return create_engine(conn_str, pool_pre_ping=True, pool_recycle=3600, **pool_args)
+
+def get_engine():
+    """
+    Returns the process-wide SQLAlchemy engine for DB_TYPE, creating it on
+    first use. The engine owns a thread-safe connection pool sized by
+    DB_POOL_SIZE / DB_MAX_OVERFLOW, so callers should not dispose it.
+    """
+    engine = _ENGINES.get(DB_TYPE)
+    if engine is None:
+        with _ENGINE_LOCK:
+            engine = _ENGINES.get(DB_TYPE)
+            if engine is None:
+                engine = _create_engine()
+                _count_pool_events(engine)
+                _ENGINES[DB_TYPE] = engine
+    return engine
+
+def dispose_engine(close=True):
+    """
+    Closes every pooled connection and forgets the cached engine, e.g. after
+    the database file has been replaced. The next get_engine() starts fresh.
+    Forked child processes should pass close=False so they drop the parent's
+    connections without closing them underneath it.
+    """
+    with _ENGINE_LOCK:
+        engine = _ENGINES.pop(DB_TYPE, None)
+        _INITIALIZED.discard(DB_TYPE)
+        _VERSION_STATE.update(version=None, checked_at=0.0)
+    if engine is not None:
+        engine.dispose(close=close)
 
-def initialize_database():
+def missing_backend_packages():
+    """
+    Returns the packages DB_TYPE needs that are not installed, so the app
+    and the ETL can stop up front instead of failing on the first query.
+    """
+    return [name for name in BACKEND_PACKAGES.get(DB_TYPE, ()) if importlib.util.find_spec(name) is None]
+
+def get_pool_stats():
+    """
+    Returns the current pool state for the cached engine: configured size,
+    connections checked in/out, overflow in use, plus totals of new DBAPI
+    connections opened and checkouts served since the engine was created.
+    """
+    engine = _ENGINES.get(DB_TYPE)
+    if engine is None:
+        return {'db_type': DB_TYPE, 'initialized': False}
+    pool = engine.pool
+    return {
+        'db_type': DB_TYPE,
+        'initialized': True,
+        'pool_size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+        'connects': _POOL_EVENTS['connects'],
+        'checkouts': _POOL_EVENTS['checkouts'],
+    }
+
+def get_statement_stats():
+    """
+    Returns how many executed statements were compiled fresh vs reused from
+    SQLAlchemy's compiled-statement cache ('uncached' covers raw DBAPI SQL),
+    plus the number of distinct statements execute_query has prepared.
+    """
+    return {**_STATEMENT_EVENTS, 'statements': len(_STATEMENTS)}
+
+def get_sqlite_profile():
+    """
+    Returns the pragma values actually in effect on a pooled SQLite
+    connection, to confirm SQLITE_PRAGMAS was applied.
+    """
+    if DB_TYPE not in SQLITE_BACKENDS:
+        return {}
+    with get_engine().connect() as conn:
+        return {pragma: conn.exec_driver_sql(f"PRAGMA {pragma}").scalar() for pragma in SQLITE_PRAGMAS}
+
+def initialize_database(force=False):
     """
     Initializes the database schema if proper tables are missing.
-    Safe to run multiple times (idempotent).
+    Safe to run multiple times (idempotent). The DDL runs once per process
+    and engine: Streamlit calls this on every rerun, and later calls return
+    immediately unless `force` is set. Statements that fail (e.g. indexes
+    on a table from an older schema) are reported on that first attempt
+    and not retried; a reload with `python -m src.etl` rebuilds the tables
+    and their indexes. Returns the number of failed statements.
     """
-    if DB_TYPE != 'sqlite':
-        return # Skip for MySQL to avoid altering legacy DB during audit/migration
+    if DB_TYPE not in SQLITE_BACKENDS:
+        return 0 # Skip for MySQL to avoid altering legacy DB during audit/migration
+    if DB_TYPE in _INITIALIZED and not force:
+        return 0
 
-    engine = get_engine()
+    with _SCHEMA_LOCK:
+        if DB_TYPE in _INITIALIZED and not force:
+            return 0
+        engine = get_engine()
+        failed = 0
+        # Each statement runs on its own: a table left from an older schema
+        # (e.g. top_* without entity_type) fails only its own indexes
+        for query in SCHEMA_DEFINITIONS + INDEX_DEFINITIONS:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(query))
+            except Exception as e:
+                failed += 1
+                statement = ' '.join(query.split('(')[0].split())
+                print(f"Database Initialization Error in '{statement}': {getattr(e, 'orig', e)}")
+        if failed:
+            print(f"{failed} schema statements failed and will not be retried in this process. "
+                  "Run `python -m src.etl` to rebuild tables from an older schema.")
+        # Recorded either way, so a failing statement is not re-run on every rerun
+        _INITIALIZED.add(DB_TYPE)
+        return failed
+
+def explain_full_scans(query, params=None):
+    """
+    Runs EXPLAIN QUERY PLAN (SQLite only) and returns the plan steps that
+    read a table row by row instead of through an index, e.g.
+    'SCAN aggregated_transaction'. Searches and index-only scans
+    ('SCAN t USING COVERING INDEX ...') are fine; an empty list means the
+    query never falls back to a full table scan.
+    """
+    with get_engine().connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), params or {}).fetchall()
+    return [
+        row[-1] for row in plan
+        if row[-1].startswith('SCAN ') and 'USING' not in row[-1] and 'SUBQUERY' not in row[-1]
+    ]
+
+# --- QUERY RESULT CACHE ---
+# LRU of key -> (expires_at, nbytes, DataFrame), bounded by QUERY_CACHE_MB.
+# Every lookup first checks the data version stamped by the ETL (read from
+# the database at most every DATA_VERSION_CHECK_SECONDS); a newer version
+# drops all entries, so dashboards never serve pre-load results.
+_QUERY_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_STATE = {'bytes': 0, 'data_version': None}
+_CACHE_STATS = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+_VERSION_STATE = {'version': None, 'checked_at': 0.0}
+
+def get_data_version():
+    """
+    Returns the data version last stamped by the ETL (0 if never loaded).
+    """
     try:
-        with engine.connect() as conn:
-            for query in SCHEMA_DEFINITIONS:
-                conn.execute(text(query))
-            # SQLite doesn't strictly need commit for DDL, but good practice
-            pass
-    except Exception as e:
-        print(f"Database Initialization Error: {e}")
+        with get_engine().connect() as conn:
+            return conn.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar() or 0
+    except Exception:
+        return 0
+
+def current_data_version():
+    """
+    The data version as last read by this process, re-read from the
+    database when it is more than DATA_VERSION_CHECK_SECONDS old. The
+    caches check it on every lookup, so hits stay in memory.
+    """
+    now = time.monotonic()
+    if _VERSION_STATE['version'] is None or now - _VERSION_STATE['checked_at'] >= DATA_VERSION_CHECK_SECONDS:
+        _VERSION_STATE.update(version=get_data_version(), checked_at=now)
+    return _VERSION_STATE['version']
+
+def bump_data_version():
+    """
+    Marks the database contents as changed. Called by load_data_to_sql
+    after every load; this process's caches drop their entries at once, and
+    other processes within DATA_VERSION_CHECK_SECONDS.
+    """
+    with get_engine().begin() as conn:
+        conn.execute(text(DATA_VERSION_DEFINITION))
+        params = {'loaded_at': datetime.now().isoformat(timespec='seconds')}
+        updated = conn.execute(
+            text("UPDATE data_version SET version = version + 1, loaded_at = :loaded_at WHERE id = 1"), params
+        ).rowcount
+        if not updated:
+            conn.execute(text("INSERT INTO data_version (id, version, loaded_at) VALUES (1, 1, :loaded_at)"), params)
+        version = conn.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar()
+    _VERSION_STATE.update(version=version, checked_at=time.monotonic())
+    clear_query_cache()
+    return version
+
+def _cache_key(query, params=None):
+    """Whitespace-normalized SQL plus sorted parameters."""
+    return ' '.join(query.split()), tuple(sorted((params or {}).items()))
+
+def _cache_get(key):
+    version = current_data_version()
+    with _CACHE_LOCK:
+        if version != _CACHE_STATE['data_version']:
+            if _QUERY_CACHE:
+                _CACHE_STATS['invalidations'] += 1
+            _QUERY_CACHE.clear()
+            _CACHE_STATE.update(bytes=0, data_version=version)
+        entry = _QUERY_CACHE.get(key)
+        if entry is None:
+            _CACHE_STATS['misses'] += 1
+            return None
+        expires_at, nbytes, df = entry
+        if expires_at < time.monotonic():
+            del _QUERY_CACHE[key]
+            _CACHE_STATE['bytes'] -= nbytes
+            _CACHE_STATS['expirations'] += 1
+            _CACHE_STATS['misses'] += 1
+            return None
+        _QUERY_CACHE.move_to_end(key)
+        _CACHE_STATS['hits'] += 1
+        return df
+
+def _cache_put(key, df):
+    nbytes = int(df.memory_usage(index=True, deep=True).sum())
+    limit = QUERY_CACHE_MB * 1024 * 1024
+    if nbytes > limit: return
+    with _CACHE_LOCK:
+        if key in _QUERY_CACHE:
+            _CACHE_STATE['bytes'] -= _QUERY_CACHE.pop(key)[1]
+        _QUERY_CACHE[key] = (time.monotonic() + QUERY_CACHE_TTL, nbytes, df)
+        _CACHE_STATE['bytes'] += nbytes
+        while _CACHE_STATE['bytes'] > limit:
+            _, (_, evicted, _) = _QUERY_CACHE.popitem(last=False)
+            _CACHE_STATE['bytes'] -= evicted
+            _CACHE_STATS['evictions'] += 1
+
+def clear_query_cache():
+    with _CACHE_LOCK:
+        _QUERY_CACHE.clear()
+        _CACHE_STATE.update(bytes=0, data_version=None)
+
+def get_cache_stats():
+    """
+    Returns query cache counters (hits, misses, evictions, expirations,
+    invalidations) plus current entries, memory use and data version.
+    """
+    with _CACHE_LOCK:
+        return {
+            **_CACHE_STATS,
+            'entries': len(_QUERY_CACHE),
+            'megabytes': round(_CACHE_STATE['bytes'] / (1024 * 1024), 2),
+            'data_version': _CACHE_STATE['data_version'],
+        }
+
+# --- SHARED FRAME STORE ---
+# Tables (or column/period slices of them) loaded once per process and
+# data version in compact dtypes, shared by every Streamlit session. With
+# DB_TYPE='parquet' they are read from the Parquet export, decoding only
+# the requested columns and year/quarter partitions. Sessions get shallow views:
+# under copy-on-write a session that modifies its view copies just the
+# columns it touches, so the stored frame is never changed. Each slice
+# loads under its own lock, so a cold load only holds up sessions waiting
+# for that same slice. The store is an LRU of key -> (nbytes, DataFrame)
+# bounded by FRAME_STORE_MB; a slice's load lock goes with its entry.
+_FRAME_STORE = OrderedDict()
+_FRAME_LOCK = threading.Lock()
+_FRAME_LOAD_LOCKS = {}
+_FRAME_STATE = {'bytes': 0, 'data_version': None}
+_FRAME_STATS = {'hits': 0, 'loads': 0, 'evictions': 0, 'invalidations': 0}
+
+def _frame_store_reset(version=None):
+    """Drops every stored frame and load lock. Call with _FRAME_LOCK held."""
+    _FRAME_STORE.clear()
+    _FRAME_LOAD_LOCKS.clear()
+    _FRAME_STATE.update(bytes=0, data_version=version)
+
+def _frame_store_put(key, frame):
+    """Stores a loaded frame, evicting least recently used slices. Call with _FRAME_LOCK held."""
+    nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+    limit = FRAME_STORE_MB * 1024 * 1024
+    if nbytes > limit:
+        _FRAME_LOAD_LOCKS.pop(key, None)
+        return
+    if key in _FRAME_STORE:
+        _FRAME_STATE['bytes'] -= _FRAME_STORE.pop(key)[0]
+    _FRAME_STORE[key] = (nbytes, frame)
+    _FRAME_STATE['bytes'] += nbytes
+    while _FRAME_STATE['bytes'] > limit:
+        evicted_key, (evicted, _) = _FRAME_STORE.popitem(last=False)
+        _FRAME_LOAD_LOCKS.pop(evicted_key, None)
+        _FRAME_STATE['bytes'] -= evicted
+        _FRAME_STATS['evictions'] += 1
 
-def execute_query(query):
+def typed_frame(df):
     """
-    Executes a read query and returns the results as a pandas DataFrame.
+    Applies the compact dtypes every loaded frame uses: DIMENSION_COLUMNS
+    become categoricals and the integer PERIOD_COLUMNS (year, quarter) are
+    downcast to the narrowest type that holds their values. Measures keep
+    int64/float64: the scenarios multiply, subtract and sum them, which
+    would silently wrap around in int8/int16/int32, and amounts run to 1e13.
     """
-    engine = get_engine()
+    for column in df.columns:
+        series = df[column]
+        if column in DIMENSION_COLUMNS and (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            df[column] = series.astype('category')
+        elif column in PERIOD_COLUMNS and pd.api.types.is_integer_dtype(series):
+            df[column] = pd.to_numeric(series, downcast='integer')
+    return df
+
+def _load_table(table_name, columns=None, years=None, quarters=None):
+    if DB_TYPE == 'parquet':
+        from src.columnar import read_parquet_table
+        return read_parquet_table(table_name, columns, years, quarters)
+    sql = f"SELECT {', '.join(columns) if columns else '*'} FROM {table_name}"
+    params, conditions = {}, []
+    for column, values in (('year', years), ('quarter', quarters)):
+        if values:
+            names = [f"{column}_{i}" for i in range(len(values))]
+            params.update({name: int(value) for name, value in zip(names, values)})
+            conditions.append(f"{column} IN ({', '.join(':' + name for name in names)})")
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    return _read_sql(sql, params)
+
+def get_table(table_name, columns=None, years=None, quarters=None):
+    """
+    Returns a read-only view of a table from the shared frame store,
+    loading it on first use. `columns`, `years` and `quarters` narrow what
+    is loaded (projection and partition pruning); each distinct slice is
+    stored once. The store is dropped when the ETL bumps the data version,
+    so the next call reloads current data.
+    """
+    key = table_name
+    if columns or years or quarters:
+        key += f"[{', '.join(columns or ['*'])}]"
+        if years:
+            key += f"@{','.join(str(year) for year in sorted(years))}"
+        if quarters:
+            key += f"/Q{','.join(str(quarter) for quarter in sorted(quarters))}"
+    version = current_data_version()
+    with _FRAME_LOCK:
+        if version != _FRAME_STATE['data_version']:
+            if _FRAME_STORE:
+                _FRAME_STATS['invalidations'] += 1
+            _frame_store_reset(version)
+        entry = _FRAME_STORE.get(key)
+        if entry is not None:
+            _FRAME_STORE.move_to_end(key)
+            _FRAME_STATS['hits'] += 1
+            return entry[1].copy(deep=False)
+        load_lock = _FRAME_LOAD_LOCKS.setdefault(key, threading.Lock())
+
+    with load_lock:
+        # Another session may have loaded the slice while this one waited
+        with _FRAME_LOCK:
+            entry = _FRAME_STORE.get(key) if version == _FRAME_STATE['data_version'] else None
+            if entry is not None:
+                _FRAME_STORE.move_to_end(key)
+                _FRAME_STATS['hits'] += 1
+        if entry is not None:
+            return entry[1].copy(deep=False)
+        try:
+            frame = typed_frame(_load_table(table_name, columns, years, quarters))
+        except Exception as e:
+            print(f"Database Query Error: {e}")
+            return pd.DataFrame()
+        with _FRAME_LOCK:
+            # Not stored if the ETL loaded new data in the meantime
+            if version == _FRAME_STATE['data_version']:
+                _frame_store_put(key, frame)
+            _FRAME_STATS['loads'] += 1
+    return frame.copy(deep=False)
+
+def clear_frame_store():
+    with _FRAME_LOCK:
+        _frame_store_reset()
+
+def get_frame_store_stats():
+    """
+    Returns frame store counters (hits, loads, evictions, invalidations),
+    the memory held per slice and in total (MB), and the data version it
+    reflects.
+    """
+    with _FRAME_LOCK:
+        tables = {name: round(nbytes / (1024 * 1024), 3) for name, (nbytes, _) in _FRAME_STORE.items()}
+        return {
+            **_FRAME_STATS,
+            'tables': tables,
+            'megabytes': round(_FRAME_STATE['bytes'] / (1024 * 1024), 3),
+            'data_version': _FRAME_STATE['data_version'],
+        }
+
+# SQL text -> TextClause, built once per distinct statement
+_STATEMENTS = {}
+
+def _statement(sql):
+    statement = _STATEMENTS.get(sql)
+    if statement is None:
+        statement = _STATEMENTS.setdefault(sql, text(sql))
+    return statement
+
+def _bind(params):
+    """Plain Python values for the driver (numpy scalars from pandas filters included)."""
+    return {name: value.item() if hasattr(value, 'item') else value for name, value in (params or {}).items()}
+
+def _read_sql(sql, params):
+    if DB_TYPE == 'duckdb':
+        from src.analytical import run_duckdb_query
+        return run_duckdb_query(sql, params)
+    if DB_TYPE == 'parquet':
+        from src.columnar import run_parquet_query
+        return run_parquet_query(sql, params)
+    return pd.read_sql(_statement(sql), get_engine(), params=params)
+
+def execute_query(query, params=None):
+    """
+    Executes a read query and returns the results as a pandas DataFrame
+    in the compact dtypes of typed_frame. `query` is either the name of a
+    query in src/queries.py or SQL text; values go in `params` and are
+    bound as :name placeholders, never formatted into the SQL. With
+    DB_TYPE='duckdb' the same SQL runs on the DuckDB copy, and with
+    DB_TYPE='parquet' on the Parquet export.
+    Results are served from the query cache until they expire
+    (QUERY_CACHE_TTL) or the ETL loads new data. Callers get a shallow
+    copy: under copy-on-write, modifying it copies only the columns it
+    touches and never changes the cached result.
+    """
+    sql = QUERIES.get(query, query)
+    params = _bind(params)
+    caching = QUERY_CACHE_MB > 0 and QUERY_CACHE_TTL > 0
+    key = _cache_key(sql, params)
+    if caching:
+        df = _cache_get(key)
+        if df is not None:
+            return df.copy(deep=False)
+
     try:
-        return pd.read_sql(query, engine)
+        df = typed_frame(_read_sql(sql, params))
     except Exception as e:
         # Silent fail or log as needed
         print(f"Database Query Error: {e}")
         return pd.DataFrame()
+    if caching:
+        _cache_put(key, df)
+    return df.copy(deep=False)
@@ -0,0 +1,45 @@
+# Named dashboard queries. Values are bound (:year, :quarter, ...) rather
+# than formatted into the SQL, so each statement has one fixed text: it is
+# compiled once and reused, and its result cache key only varies by the
+# parameters. Run them with execute_query(name, params).
+
+QUERIES = {
+    # Filter options
+    'transaction_years': "SELECT DISTINCT year FROM aggregated_transaction ORDER BY year DESC",
+    'user_years': "SELECT DISTINCT year FROM aggregated_user ORDER BY year DESC",
+    'insurance_years': "SELECT DISTINCT year FROM aggregated_insurance ORDER BY year DESC",
+    'device_years': "SELECT DISTINCT year FROM aggregated_user_device ORDER BY year DESC",
+    'transaction_states': "SELECT DISTINCT state FROM rollup_transaction_state_year ORDER BY state",
+
+    # Precomputed growth (GROWTH_METRICS in src/etl.py)
+    'growth_by_year': "SELECT state, category, quarter, value, growth_rate FROM growth_metrics WHERE metric = :metric AND year = :year",
+
+    # National trends, with the state-level rollups as fallback
+    'brand_trend_states': "SELECT year, brand, SUM(count) as count FROM aggregated_user_device GROUP BY year, brand ORDER BY year, brand",
+    'insurance_trend': "SELECT year, quarter, SUM(insurance_count) as insurance_count FROM national_insurance GROUP BY year, quarter ORDER BY year, quarter",
+    'insurance_trend_rollup': "SELECT year, quarter, insurance_count FROM rollup_insurance_national_quarter ORDER BY year, quarter",
+    'user_trend': "SELECT year, quarter, SUM(registered_users) as registered_users FROM national_user GROUP BY year, quarter ORDER BY year, quarter",
+    'user_trend_rollup': "SELECT year, quarter, registered_users FROM rollup_user_national_quarter ORDER BY year, quarter",
+
+    # Per-year state and district totals
+    'state_transactions_by_year': "SELECT state, transaction_count as total_trans FROM rollup_transaction_state_year WHERE year = :year",
+    'state_users_by_year': "SELECT state, registered_users, app_opens FROM rollup_user_state_year WHERE year = :year",
+    'state_insurance_by_year': "SELECT state, insurance_count, insurance_amount FROM rollup_insurance_state_year WHERE year = :year",
+    'state_brands_by_year': "SELECT state, brand, SUM(count) as count FROM aggregated_user_device WHERE year = :year GROUP BY state, brand",
+    'district_users_by_year': "SELECT state, district, registered_users as users FROM rollup_user_district_year WHERE year = :year",
+
+    # Quarterly category trend of one state, and payment mix per state and year
+    'state_category_trend': "SELECT year, quarter, transaction_type, SUM(transaction_amount) as transaction_amount FROM aggregated_transaction WHERE state = :state GROUP BY year, quarter, transaction_type ORDER BY year, quarter",
+    'category_mix': "SELECT state, year, transaction_type, SUM(transaction_amount) as amount FROM aggregated_transaction GROUP BY state, year, transaction_type",
+
+    # Leaderboards for one year and quarter
+    'top_states_transaction': "SELECT state, transaction_count as count, transaction_amount as amount FROM rollup_transaction_state_quarter WHERE year = :year AND quarter = :quarter ORDER BY count DESC LIMIT 10",
+    'top_districts_transaction': "SELECT entity_name as district, state, SUM(count) as count FROM top_map WHERE entity_type = 'district' AND year = :year AND quarter = :quarter GROUP BY entity_name, state ORDER BY count DESC LIMIT 10",
+    'top_pincodes_transaction': "SELECT entity_name as pincode, state, SUM(count) as count FROM top_map WHERE entity_type = 'pincode' AND year = :year AND quarter = :quarter GROUP BY entity_name, state ORDER BY count DESC LIMIT 10",
+    'top_states_user': "SELECT state, registered_users as users FROM rollup_user_state_quarter WHERE year = :year AND quarter = :quarter ORDER BY users DESC LIMIT 10",
+    'top_districts_user': "SELECT entity_name as district, state, SUM(registered_users) as users FROM top_user WHERE entity_type = 'district' AND year = :year AND quarter = :quarter GROUP BY entity_name, state ORDER BY users DESC LIMIT 10",
+    'top_pincodes_user': "SELECT entity_name as pincode, state, SUM(registered_users) as users FROM top_user WHERE entity_type = 'pincode' AND year = :year AND quarter = :quarter GROUP BY entity_name, state ORDER BY users DESC LIMIT 10",
+    'top_states_insurance': "SELECT state, insurance_count as count FROM rollup_insurance_state_quarter WHERE year = :year AND quarter = :quarter ORDER BY count DESC LIMIT 10",
+    'top_districts_insurance': "SELECT entity_name as district, state, SUM(insurance_count) as count FROM top_insurance WHERE entity_type = 'district' AND year = :year AND quarter = :quarter GROUP BY entity_name, state ORDER BY count DESC LIMIT 10",
+    'top_pincodes_insurance': "SELECT entity_name as pincode, state, SUM(insurance_count) as count FROM top_insurance WHERE entity_type = 'pincode' AND year = :year AND quarter = :quarter GROUP BY entity_name, state ORDER BY count DESC LIMIT 10",
+}
@@ -0,0 +1,254 @@
+import time
+import threading
+from src.config import SCENARIO_PRELOAD, SCENARIO_PRELOAD_YEARS, SCENARIO_PRELOAD_IDLE, QUERY_CACHE_TTL
+
+# --- SCENARIO REGISTRY ---
+# Each scenario: its sidebar label, the name of its render function in
+# src.case_studies, and the data it reads on first paint. 'queries'
+# are named queries from src/queries.py and 'tables' are get_table slices
+# (table, columns, years). Parameter values starting with '@' stand for the
+# sidebar filters: '@year' and '@state' take their values from the query
+# listed under 'filters' (the most recent SCENARIO_PRELOAD_YEARS years, the
+# first state as the selectbox shows it), '@quarter' covers all four
+# quarters. preload_scenarios() runs these to warm the caches.
+
+QUARTERS = [1, 2, 3, 4]
+
+SCENARIOS = {
+    'transaction_dynamics': {
+        'label': "1. Decoding Transaction Dynamics",
+        'render': 'show_scenario_1',
+        'filters': {'@year': 'transaction_years', '@state': 'transaction_states'},
+        'queries': [
+            ('growth_by_year', {'metric': 'category_amount_yoy', 'year': '@year'}),
+            ('growth_by_year', {'metric': 'state_amount_yoy', 'year': '@year'}),
+            ('state_category_trend', {'state': '@state'}),
+        ],
+    },
+    'device_dominance': {
+        'label': "2. Device Dominance & Engagement",
+        'render': 'show_scenario_2',
+        'filters': {'@year': 'device_years'},
+        'queries': [
+            ('state_brands_by_year', {'year': '@year'}),
+            ('state_users_by_year', {'year': '@year'}),
+            ('brand_trend_states', {}),
+            ('state_transactions_by_year', {'year': '@year'}),
+        ],
+    },
+    'insurance_penetration': {
+        'label': "3. Insurance Penetration & Growth",
+        'render': 'show_scenario_3',
+        'filters': {'@year': 'insurance_years'},
+        'queries': [
+            ('insurance_trend', {}),
+            ('state_insurance_by_year', {'year': '@year'}),
+            ('state_transactions_by_year', {'year': '@year'}),
+        ],
+    },
+    'market_expansion': {
+        'label': "4. Market Expansion Strategy",
+        'render': 'show_scenario_4',
+        'filters': {'@year': 'transaction_years'},
+        'queries': [
+            ('category_mix', {}),
+            ('growth_by_year', {'metric': 'state_count_qoq', 'year': '@year'}),
+        ],
+        'tables': [
+            ('rollup_transaction_state_quarter', ['state', 'year', 'quarter', 'transaction_count'], '@year'),
+            ('rollup_transaction_district_year', ['state', 'district', 'year', 'transaction_count'], '@year'),
+        ],
+    },
+    'user_engagement': {
+        'label': "5. User Engagement & Growth",
+        'render': 'show_scenario_5',
+        'filters': {'@year': 'user_years'},
+        'queries': [
+            ('user_trend', {}),
+            ('state_users_by_year', {'year': '@year'}),
+            ('district_users_by_year', {'year': '@year'}),
+        ],
+    },
+    'insurance_uptake': {
+        'label': "6. Insurance Engagement (Uptake)",
+        'render': 'show_scenario_6',
+        'filters': {'@year': 'insurance_years'},
+        'queries': [
+            ('state_insurance_by_year', {'year': '@year'}),
+        ],
+    },
+    'top_transactions': {
+        'label': "7. Top Transaction Performers",
+        'render': 'show_scenario_7',
+        'filters': {'@year': 'transaction_years'},
+        'queries': [
+            (name, {'year': '@year', 'quarter': '@quarter'})
+            for name in ('top_states_transaction', 'top_districts_transaction', 'top_pincodes_transaction')
+        ],
+    },
+    'top_users': {
+        'label': "8. Top User Registration",
+        'render': 'show_scenario_8',
+        'filters': {'@year': 'user_years'},
+        'queries': [
+            (name, {'year': '@year', 'quarter': '@quarter'})
+            for name in ('top_states_user', 'top_districts_user', 'top_pincodes_user')
+        ],
+    },
+    'top_insurance': {
+        'label': "9. Top Insurance Performers",
+        'render': 'show_scenario_9',
+        'filters': {'@year': 'insurance_years'},
+        'queries': [
+            (name, {'year': '@year', 'quarter': '@quarter'})
+            for name in ('top_states_insurance', 'top_districts_insurance', 'top_pincodes_insurance')
+        ],
+    },
+}
+
+# Process-wide view counts and preload state, shared by all sessions.
+# 'rendering' counts renders in progress and 'last_render' is when the
+# last one finished; the preload thread only works while both say idle.
+_VIEWS = {scenario_id: 0 for scenario_id in SCENARIOS}
+_PRELOAD_LOCK = threading.Lock()
+_PRELOAD_STATE = {
+    'thread': None, 'rendering': 0, 'last_render': None,
+    'data_version': None, 'warmed_at': None, 'seconds': None, 'queries': 0,
+}
+
+def render_scenario(scenario_id):
+    """
+    Counts a view and renders the scenario. src.case_studies (all nine
+    scenarios, with pandas and plotly) is imported on the first render,
+    after the sidebar has painted; later reruns find it already loaded.
+    """
+    spec = SCENARIOS[scenario_id]
+    with _PRELOAD_LOCK:
+        _VIEWS[scenario_id] += 1
+        _PRELOAD_STATE['rendering'] += 1
+    try:
+        import src.case_studies
+        getattr(src.case_studies, spec['render'])()
+    finally:
+        with _PRELOAD_LOCK:
+            _PRELOAD_STATE['rendering'] -= 1
+            _PRELOAD_STATE['last_render'] = time.monotonic()
+
+def _filter_values(placeholder, query):
+    from src.db import execute_query
+    df = execute_query(query)
+    column = placeholder[1:]
+    if df.empty or column not in df.columns:
+        return []
+    if placeholder == '@year':
+        return sorted(df[column].tolist(), reverse=True)[:SCENARIO_PRELOAD_YEARS]
+    return df[column].tolist()[:1]
+
+def _expand(params, values):
+    """Every combination of filter values for the placeholders in `params`."""
+    combinations = [{}]
+    for name, value in params.items():
+        options = values.get(value, []) if isinstance(value, str) and value.startswith('@') else [value]
+        combinations = [dict(combination, **{name: option}) for combination in combinations for option in options]
+    return combinations
+
+def warm_scenario(scenario_id):
+    """
+    Runs the queries and table loads a scenario makes on first paint, so
+    they are served from the query cache and frame store when a session
+    opens it. Returns the number of queries and loads issued.
+    """
+    from src.db import execute_query, get_table
+    spec = SCENARIOS[scenario_id]
+    values = {'@quarter': QUARTERS}
+    for placeholder, query in spec.get('filters', {}).items():
+        values[placeholder] = _filter_values(placeholder, query)
+    issued = len(values) - 1
+
+    for name, params in spec.get('queries', []):
+        for bound in _expand(params, values):
+            execute_query(name, bound)
+            issued += 1
+    for table_name, columns, years in spec.get('tables', []):
+        for bound in _expand({'years': years}, values):
+            get_table(table_name, columns, [bound['years']])
+            issued += 1
+    return issued
+
+def _idle():
+    """True when no render is running and none finished in the last SCENARIO_PRELOAD_IDLE seconds."""
+    with _PRELOAD_LOCK:
+        last_render = _PRELOAD_STATE['last_render']
+        return not _PRELOAD_STATE['rendering'] and (
+            last_render is None or time.monotonic() - last_render >= SCENARIO_PRELOAD_IDLE
+        )
+
+def _preload_due(version):
+    """A warm-up is due once per data version, and again after half of QUERY_CACHE_TTL."""
+    with _PRELOAD_LOCK:
+        warmed_at = _PRELOAD_STATE['warmed_at']
+        return version != _PRELOAD_STATE['data_version'] or warmed_at is None or time.monotonic() - warmed_at >= QUERY_CACHE_TTL / 2
+
+def _preload(version):
+    """
+    Warms the most viewed scenarios one by one. Stops as soon as a session
+    renders; the warm-up then counts as not done and runs again at the
+    next idle spell, finding what it already loaded in the caches.
+    """
+    with _PRELOAD_LOCK:
+        ranked = sorted(SCENARIOS, key=lambda scenario_id: _VIEWS[scenario_id], reverse=True)
+
+    start = time.monotonic()
+    issued = 0
+    for scenario_id in ranked[:SCENARIO_PRELOAD]:
+        if not _idle():
+            return
+        try:
+            issued += warm_scenario(scenario_id)
+        except Exception as e:
+            print(f"Error preloading {scenario_id}: {e}")
+    with _PRELOAD_LOCK:
+        _PRELOAD_STATE.update(
+            data_version=version, warmed_at=time.monotonic(),
+            seconds=round(time.monotonic() - start, 3), queries=issued
+        )
+
+def _preload_loop():
+    from src.db import get_data_version
+    while True:
+        time.sleep(SCENARIO_PRELOAD_IDLE)
+        if not _idle():
+            continue
+        version = get_data_version()
+        if _preload_due(version):
+            _preload(version)
+
+def preload_scenarios():
+    """
+    Starts the process's single preload thread, once; later calls return
+    immediately. The thread warms the caches for the SCENARIO_PRELOAD most
+    viewed scenarios only while the app is idle (no render for
+    SCENARIO_PRELOAD_IDLE seconds), once per data version and again after
+    half of QUERY_CACHE_TTL, so it never competes with an interaction.
+    """
+    if SCENARIO_PRELOAD <= 0:
+        return
+    with _PRELOAD_LOCK:
+        if _PRELOAD_STATE['thread'] is not None:
+            return
+        thread = threading.Thread(target=_preload_loop, name='scenario-preload', daemon=True)
+        _PRELOAD_STATE['thread'] = thread
+    thread.start()
+
+def get_scenario_stats():
+    """
+    Returns view counts per scenario and the last warm-up: data version,
+    duration (seconds) and queries issued.
+    """
+    with _PRELOAD_LOCK:
+        return {
+            'views': dict(_VIEWS),
+            'data_version': _PRELOAD_STATE['data_version'],
+            'seconds': _PRELOAD_STATE['seconds'],
+            'queries': _PRELOAD_STATE['queries'],
+        }
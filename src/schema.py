@@ -1,6 +1,37 @@
 
 # Auto-generated schema definitions from MySQL dump
 
+# Tracks which source JSON files have been ingested into which table,
+# so incremental ETL runs only re-parse new or changed files.
+MANIFEST_DEFINITION = """CREATE TABLE IF NOT EXISTS etl_manifest (
+        table_name VARCHAR(64) NOT NULL,
+        path VARCHAR(255) NOT NULL,
+        mtime REAL,
+        size INTEGER,
+        content_hash TEXT,
+        ingested_at TEXT,
+        PRIMARY KEY (table_name, path)
+    );"""
+
+# Single-row stamp bumped by every ETL load; the query cache in src/db.py
+# compares it to decide whether cached results are still current.
+DATA_VERSION_DEFINITION = """CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        loaded_at TEXT
+    );"""
+
+# Per-table progress of the chunked MySQL -> SQLite migration
+# (migrate_phase3.py): rows committed so far, so a failed run resumes after
+# the last committed chunk. Only created by the migration.
+MIGRATION_PROGRESS_DEFINITION = """CREATE TABLE IF NOT EXISTS migration_progress (
+        table_name VARCHAR(64) PRIMARY KEY,
+        rows_copied INTEGER NOT NULL,
+        chunks INTEGER NOT NULL,
+        completed INTEGER NOT NULL,
+        updated_at TEXT
+    );"""
+
 SCHEMA_DEFINITIONS = [
     """CREATE TABLE IF NOT EXISTS aggregated_insurance (
         state TEXT,
@@ -82,5 +113,223 @@ SCHEMA_DEFINITIONS = [
         year INTEGER DEFAULT NULL,
         quarter INTEGER DEFAULT NULL,
         registered_users INTEGER DEFAULT NULL
-    );"""
+    );""",
+    # National-level tables loaded from the country files (<dataset>/country/india/<year>/<quarter>.json)
+    """CREATE TABLE IF NOT EXISTS national_insurance (
+        year INTEGER DEFAULT NULL,
+        quarter INTEGER DEFAULT NULL,
+        insurance_type TEXT,
+        insurance_count INTEGER DEFAULT NULL,
+        insurance_amount REAL DEFAULT NULL
+    );""",
+    """CREATE TABLE IF NOT EXISTS national_transaction (
+        year INTEGER DEFAULT NULL,
+        quarter INTEGER DEFAULT NULL,
+        transaction_type TEXT,
+        transaction_count INTEGER DEFAULT NULL,
+        transaction_amount REAL DEFAULT NULL
+    );""",
+    """CREATE TABLE IF NOT EXISTS national_user (
+        year INTEGER DEFAULT NULL,
+        quarter INTEGER DEFAULT NULL,
+        registered_users INTEGER DEFAULT NULL,
+        app_opens INTEGER DEFAULT NULL
+    );""",
+    """CREATE TABLE IF NOT EXISTS national_user_device (
+        year INTEGER DEFAULT NULL,
+        quarter INTEGER DEFAULT NULL,
+        brand TEXT,
+        count INTEGER DEFAULT NULL,
+        percentage REAL DEFAULT NULL
+    );""",
+    """CREATE TABLE IF NOT EXISTS national_top_insurance (
+        entity_name TEXT,
+        entity_type TEXT,
+        year INTEGER DEFAULT NULL,
+        quarter INTEGER DEFAULT NULL,
+        insurance_count INTEGER DEFAULT NULL,
+        insurance_amount REAL DEFAULT NULL
+    );""",
+    """CREATE TABLE IF NOT EXISTS national_top_map (
+        entity_name TEXT,
+        entity_type TEXT,
+        year INTEGER DEFAULT NULL,
+        quarter INTEGER DEFAULT NULL,
+        count INTEGER DEFAULT NULL,
+        amount REAL DEFAULT NULL
+    );""",
+    """CREATE TABLE IF NOT EXISTS national_top_user (
+        entity_name TEXT,
+        entity_type TEXT,
+        year INTEGER DEFAULT NULL,
+        quarter INTEGER DEFAULT NULL,
+        registered_users INTEGER DEFAULT NULL
+    );""",
+    # Rollups materialized by the ETL (src/etl.py ROLLUP_SPECS) so the
+    # dashboards read pre-aggregated rows instead of re-summing fact tables.
+    """CREATE TABLE IF NOT EXISTS rollup_transaction_state_quarter (
+        state VARCHAR(64) NOT NULL,
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        transaction_count BIGINT DEFAULT NULL,
+        transaction_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, quarter, state)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_transaction_state_year (
+        state VARCHAR(64) NOT NULL,
+        year INTEGER NOT NULL,
+        transaction_count BIGINT DEFAULT NULL,
+        transaction_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, state)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_transaction_national_quarter (
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        transaction_count BIGINT DEFAULT NULL,
+        transaction_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, quarter)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_transaction_district_year (
+        state VARCHAR(64) NOT NULL,
+        district VARCHAR(128) NOT NULL,
+        year INTEGER NOT NULL,
+        transaction_count BIGINT DEFAULT NULL,
+        transaction_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, state, district)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_user_state_quarter (
+        state VARCHAR(64) NOT NULL,
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        registered_users BIGINT DEFAULT NULL,
+        app_opens BIGINT DEFAULT NULL,
+        PRIMARY KEY (year, quarter, state)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_user_state_year (
+        state VARCHAR(64) NOT NULL,
+        year INTEGER NOT NULL,
+        registered_users BIGINT DEFAULT NULL,
+        app_opens BIGINT DEFAULT NULL,
+        PRIMARY KEY (year, state)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_user_national_quarter (
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        registered_users BIGINT DEFAULT NULL,
+        app_opens BIGINT DEFAULT NULL,
+        PRIMARY KEY (year, quarter)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_user_district_year (
+        state VARCHAR(64) NOT NULL,
+        district VARCHAR(128) NOT NULL,
+        year INTEGER NOT NULL,
+        registered_users BIGINT DEFAULT NULL,
+        app_opens BIGINT DEFAULT NULL,
+        PRIMARY KEY (year, state, district)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_insurance_state_quarter (
+        state VARCHAR(64) NOT NULL,
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        insurance_count BIGINT DEFAULT NULL,
+        insurance_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, quarter, state)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_insurance_state_year (
+        state VARCHAR(64) NOT NULL,
+        year INTEGER NOT NULL,
+        insurance_count BIGINT DEFAULT NULL,
+        insurance_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, state)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_insurance_national_quarter (
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        insurance_count BIGINT DEFAULT NULL,
+        insurance_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, quarter)
+    );""",
+    """CREATE TABLE IF NOT EXISTS rollup_insurance_district_year (
+        state VARCHAR(64) NOT NULL,
+        district VARCHAR(128) NOT NULL,
+        year INTEGER NOT NULL,
+        insurance_count BIGINT DEFAULT NULL,
+        insurance_amount REAL DEFAULT NULL,
+        PRIMARY KEY (year, state, district)
+    );""",
+    # Year-over-year / quarter-over-quarter growth computed once per ETL run;
+    # `metric` names the series (see GROWTH_METRICS in src/etl.py).
+    """CREATE TABLE IF NOT EXISTS growth_metrics (
+        metric VARCHAR(32) NOT NULL,
+        state VARCHAR(64) NOT NULL,
+        category VARCHAR(64) DEFAULT NULL,
+        year INTEGER NOT NULL,
+        quarter INTEGER DEFAULT NULL,
+        value REAL DEFAULT NULL,
+        prev_value REAL DEFAULT NULL,
+        growth_rate REAL DEFAULT NULL
+    );""",
+    MANIFEST_DEFINITION,
+    DATA_VERSION_DEFINITION
+]
+
+# Covering indexes matched to the dashboard's access patterns: every fact
+# table is filtered by (year, quarter) and grouped by state (and district /
+# entity), so each index leads with the period and carries the measures,
+# letting SQLite answer the scenario queries from the index alone.
+# The *_trend index follows the GROUP BY order of the whole-history
+# category query, so it is streamed in index order without a sort, and
+# also serves the per-state category trend.
+# Rollup tables are keyed by their primary key.
+# The ETL builds these after a bulk load rather than before it.
+INDEX_DEFINITIONS = [
+    "CREATE INDEX IF NOT EXISTS idx_aggregated_insurance_period ON aggregated_insurance (year, quarter, state, insurance_type, insurance_count, insurance_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_aggregated_transaction_period ON aggregated_transaction (year, quarter, state, transaction_type, transaction_count, transaction_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_aggregated_transaction_trend ON aggregated_transaction (state, year, transaction_type, quarter, transaction_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_aggregated_user_period ON aggregated_user (year, quarter, state, registered_users, app_opens);",
+    "CREATE INDEX IF NOT EXISTS idx_aggregated_user_device_period ON aggregated_user_device (year, quarter, state, brand, count, percentage);",
+    "CREATE INDEX IF NOT EXISTS idx_map_insurance_period ON map_insurance (year, quarter, state, district, insurance_count, insurance_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_map_map_period ON map_map (year, quarter, state, district, total_transactions, total_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_map_user_period ON map_user (year, quarter, state, district, registered_users, app_opens);",
+    "CREATE INDEX IF NOT EXISTS idx_top_insurance_period ON top_insurance (year, quarter, entity_type, state, entity_name, insurance_count, insurance_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_top_map_period ON top_map (year, quarter, entity_type, state, entity_name, count, amount);",
+    "CREATE INDEX IF NOT EXISTS idx_top_user_period ON top_user (year, quarter, entity_type, state, entity_name, registered_users);",
+    "CREATE INDEX IF NOT EXISTS idx_national_insurance_period ON national_insurance (year, quarter, insurance_type, insurance_count, insurance_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_national_transaction_period ON national_transaction (year, quarter, transaction_type, transaction_count, transaction_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_national_user_period ON national_user (year, quarter, registered_users, app_opens);",
+    "CREATE INDEX IF NOT EXISTS idx_national_user_device_period ON national_user_device (year, quarter, brand, count, percentage);",
+    "CREATE INDEX IF NOT EXISTS idx_national_top_insurance_period ON national_top_insurance (year, quarter, entity_type, entity_name, insurance_count, insurance_amount);",
+    "CREATE INDEX IF NOT EXISTS idx_national_top_map_period ON national_top_map (year, quarter, entity_type, entity_name, count, amount);",
+    "CREATE INDEX IF NOT EXISTS idx_national_top_user_period ON national_top_user (year, quarter, entity_type, entity_name, registered_users);",
+    "CREATE INDEX IF NOT EXISTS idx_growth_metrics_year ON growth_metrics (metric, year, state, category, quarter, value, growth_rate);",
 ]
+
+# String dimensions, loaded into pandas as categoricals by src/db.py
+# (including the aliases dashboard queries select them under). Names are
+# normalized by the ETL, so the stored values are display-ready.
+DIMENSION_COLUMNS = {
+    'state', 'district', 'pincode', 'brand', 'dominant_brand',
+    'transaction_type', 'insurance_type', 'entity_name', 'entity_type',
+    'category', 'metric',
+}
+
+# Integer period keys that src/db.py downcasts (year to int16, quarter to
+# int8). They are only compared and formatted, never multiplied; measures
+# keep int64/float64 so sums, differences and percentages cannot overflow.
+PERIOD_COLUMNS = {'year', 'quarter'}
+
+def table_indexes(table_name):
+    """
+    Returns the declared CREATE INDEX statements for `table_name`.
+    """
+    return [definition for definition in INDEX_DEFINITIONS if f" ON {table_name} (" in definition]
+
+def table_definition(table_name):
+    """
+    Returns the declared CREATE TABLE statement for `table_name`, or None.
+    """
+    prefix = f"CREATE TABLE IF NOT EXISTS {table_name} ("
+    for definition in SCHEMA_DEFINITIONS:
+        if definition.startswith(prefix):
+            return definition
+    return None
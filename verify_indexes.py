@@ -0,0 +1,40 @@
+import os
+import sys
+
+# Force SQLite (EXPLAIN QUERY PLAN output is SQLite specific)
+os.environ['DB_TYPE'] = 'sqlite'
+
+try:
+    from src.db import initialize_database, explain_full_scans
+    from src.queries import QUERIES
+except ImportError:
+    # Fix python path if running from root
+    sys.path.append(os.getcwd())
+    from src.db import initialize_database, explain_full_scans
+    from src.queries import QUERIES
+
+# Every named dashboard query (src/queries.py) must be served by an index.
+# Whole-table slices the scenarios read through get_table() (src/db.py)
+# are not checked: they read every row of their years by design.
+PARAMS = {'year': 2023, 'quarter': 4, 'metric': 'category_amount_yoy', 'state': 'Karnataka'}
+
+def verify_indexes():
+    # Creates any declared index that is missing (e.g. on an older database)
+    initialize_database()
+
+    failures = 0
+    for name, query in QUERIES.items():
+        scans = explain_full_scans(query, PARAMS)
+        if scans:
+            failures += 1
+            print(f"FAIL: {name} falls back to a full scan: {'; '.join(scans)}")
+        else:
+            print(f"PASS: {name}")
+
+    if failures:
+        print(f"\n{failures} of {len(QUERIES)} dashboard queries scan a full table.")
+        sys.exit(1)
+    print(f"\nAll {len(QUERIES)} dashboard queries are served by an index.")
+
+if __name__ == "__main__":
+    verify_indexes()
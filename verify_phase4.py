@@ -1,28 +1,61 @@
 import os
 import sys
+import math
+import zlib
+import argparse
 import urllib.parse
+from collections import Counter
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, event, text, inspect
+from sqlalchemy.types import Integer, Float, Numeric
 from src.config import MYSQL_CONFIG, SQLITE_DB_PATH
 
+TABLES = [
+    'aggregated_insurance', 'aggregated_transaction', 'aggregated_user',
+    'aggregated_user_device', 'map_insurance', 'map_map', 'map_user',
+    'top_insurance', 'top_map', 'top_user'
+]
+
+# Fingerprints are computed per (state, year, quarter) partition
+PARTITION_COLUMNS = ('state', 'year', 'quarter')
+# Mismatching rows listed per drilled-down partition
+DRILL_DOWN_ROWS = 5
+
 def get_mysql_engine():
     password = urllib.parse.quote_plus(MYSQL_CONFIG['password'])
     conn_str = f"mysql+pymysql://{MYSQL_CONFIG['user']}:{password}@{MYSQL_CONFIG['host']}/{MYSQL_CONFIG['database']}"
     return create_engine(conn_str)
 
+def _crc32(value):
+    return None if value is None else zlib.crc32(str(value).encode('utf-8'))
+
+def _concat_ws(separator, *values):
+    # MySQL's CONCAT_WS(): NULL arguments are skipped
+    return separator.join(str(value) for value in values if value is not None)
+
+def _add_sqlite_functions(engine):
+    # MySQL has CRC32() and CONCAT_WS() built in; SQLite gets the same functions
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function('crc32', 1, _crc32, deterministic=True)
+        dbapi_connection.create_function('concat_ws', -1, _concat_ws, deterministic=True)
+    return engine
+
 def get_sqlite_engine():
-    return create_engine(f"sqlite:///{SQLITE_DB_PATH}")
+    return _add_sqlite_functions(create_engine(f"sqlite:///{SQLITE_DB_PATH}"))
+
+def get_source_engine(url=None):
+    """The MySQL database, or any SQLAlchemy URL (e.g. a SQLite copy)."""
+    if not url:
+        return get_mysql_engine()
+    engine = create_engine(url)
+    return _add_sqlite_functions(engine) if engine.dialect.name == 'sqlite' else engine
 
-def verify_data():
-    mysql_engine = get_mysql_engine()
+def verify_data(source_url=None):
+    mysql_engine = get_source_engine(source_url)
     sqlite_engine = get_sqlite_engine()
-    
-    tables = [
-        'aggregated_insurance', 'aggregated_transaction', 'aggregated_user',
-        'aggregated_user_device', 'map_insurance', 'map_map', 'map_user',
-        'top_insurance', 'top_map', 'top_user'
-    ]
+    tables = TABLES
     
     report = []
     report.append("# Migration Verification Report")
@@ -157,5 +190,159 @@ def verify_data():
     if overall_status == "FAIL":
         sys.exit(1)
 
+# --- FINGERPRINT VERIFICATION ---
+# Instead of loading both copies into pandas, each database computes a
+# fingerprint per partition with one GROUP BY: the row count, per column
+# the non-NULL count and the SUM of the values (numbers) or of their CRC32
+# (text), and the SUM of a CRC32 per row. Column sums alone miss values
+# swapped between rows of a partition; the row hash ties each value to the
+# rest of its row. Sums are order-independent and memory stays bounded by
+# the number of partitions. Only partitions whose fingerprints differ are
+# read row by row to show what changed.
+
+# Separator between the columns of a row hash
+ROW_SEPARATOR = '|'
+
+def fingerprint_columns(engine, table):
+    """Partition columns present in the table, and the (column, is_numeric, is_float) triples to fingerprint."""
+    columns = inspect(engine).get_columns(table)
+    partition = [c['name'] for c in columns if c['name'] in PARTITION_COLUMNS]
+    measured = [
+        (c['name'], isinstance(c['type'], (Integer, Float, Numeric)), isinstance(c['type'], Float))
+        for c in columns if c['name'] not in partition
+    ]
+    return partition, measured
+
+def _row_value(dialect, column, is_float):
+    # Floats enter the row hash as whole cents, truncated: both databases
+    # hold the same doubles, and truncation has no rounding ties to break
+    if not is_float:
+        return column
+    if dialect == 'mysql':
+        return f"CAST(TRUNCATE({column} * 100, 0) AS SIGNED)"
+    return f"CAST({column} * 100 AS INTEGER)"
+
+def row_hash(dialect, measured):
+    """SQL for a CRC32 of the row's measured columns, normalized so MySQL and SQLite agree."""
+    values = ', '.join(_row_value(dialect, column, is_float) for column, _, is_float in sorted(measured))
+    return f"CRC32(CONCAT_WS('{ROW_SEPARATOR}', {values}))"
+
+def partition_fingerprints(engine, table, partition, measured):
+    """
+    Returns {partition key: fingerprint tuple} computed inside the database.
+    """
+    expressions = ["COUNT(*)"]
+    for column, numeric, _ in measured:
+        expressions.append(f"COUNT({column})")
+        expressions.append(f"SUM({column})" if numeric else f"SUM(CRC32({column}))")
+    if measured:
+        expressions.append(f"SUM({row_hash(engine.dialect.name, measured)})")
+    key = ', '.join(partition)
+    query = f"SELECT {key + ', ' if key else ''}{', '.join(expressions)} FROM {table}"
+    if key:
+        query += f" GROUP BY {key}"
+    with engine.connect() as conn:
+        rows = conn.execute(text(query)).fetchall()
+    return {tuple(row[:len(partition)]): tuple(row[len(partition):]) for row in rows}
+
+def _same_value(left, right):
+    if left is None or right is None:
+        return left is None and right is None
+    if isinstance(left, float) or isinstance(right, float):
+        # Float sums depend on summation order
+        return math.isclose(float(left), float(right), rel_tol=1e-9, abs_tol=1e-6)
+    return int(left) == int(right)
+
+def same_fingerprint(left, right):
+    return left is not None and right is not None and all(_same_value(l, r) for l, r in zip(left, right))
+
+def _row_key(row):
+    return tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+
+def drill_down(source_engine, target_engine, table, partition, key):
+    """
+    Reads one partition from both databases and returns the rows only in
+    the source and the rows only in the target (as Counters).
+    """
+    where = ' AND '.join(f"{column} = :{column}" for column in partition)
+    query = text(f"SELECT * FROM {table}" + (f" WHERE {where}" if where else ''))
+    params = dict(zip(partition, key))
+    with source_engine.connect() as conn:
+        source_rows = Counter(_row_key(row) for row in conn.execute(query, params))
+    with target_engine.connect() as conn:
+        target_rows = Counter(_row_key(row) for row in conn.execute(query, params))
+    return source_rows - target_rows, target_rows - source_rows
+
+def verify_table_fingerprints(source_engine, target_engine, table, report):
+    """Appends the fingerprint checks for one table to `report`; returns True if it matches."""
+    partition, measured = fingerprint_columns(source_engine, table)
+    target_partition, target_measured = fingerprint_columns(target_engine, table)
+    if sorted(partition) != sorted(target_partition) or sorted(c[0] for c in measured) != sorted(c[0] for c in target_measured):
+        report.append("- **Schema (Columns)**: FAIL")
+        return False
+    report.append("- **Schema (Columns)**: PASS")
+
+    source = partition_fingerprints(source_engine, table, partition, measured)
+    target = partition_fingerprints(target_engine, table, partition, target_measured)
+    source_count = sum(fingerprint[0] for fingerprint in source.values())
+    target_count = sum(fingerprint[0] for fingerprint in target.values())
+    status = "PASS" if source_count == target_count else "FAIL"
+    report.append(f"- **Row Count**: {status} (Source: {source_count}, SQLite: {target_count})")
+
+    mismatched = [key for key in source.keys() | target.keys() if not same_fingerprint(source.get(key), target.get(key))]
+    if not mismatched:
+        report.append(f"- **Data Integrity (Fingerprint)**: PASS ({len(source)} partitions)")
+        return status == "PASS"
+
+    report.append(f"- **Data Integrity (Fingerprint)**: FAIL ({len(mismatched)}/{len(source.keys() | target.keys())} partitions differ)")
+    for key in sorted(mismatched, key=lambda k: tuple(str(v) for v in k)):
+        only_source, only_target = drill_down(source_engine, target_engine, table, partition, key)
+        label = ', '.join(f"{column}={value}" for column, value in zip(partition, key)) or 'whole table'
+        report.append(f"  - {label}: {sum(only_source.values())} rows only in Source, {sum(only_target.values())} only in SQLite")
+        for side, rows in (('Source', only_source), ('SQLite', only_target)):
+            for row in list(rows.elements())[:DRILL_DOWN_ROWS]:
+                report.append(f"    - {side}: {row}")
+    return False
+
+def verify_fingerprints(source_url=None, tables=None):
+    source_engine = get_source_engine(source_url)
+    target_engine = get_sqlite_engine()
+
+    report = []
+    report.append("# Migration Verification Report")
+    report.append(f"Date: {pd.Timestamp.now()}")
+    report.append("Mode: partition fingerprints")
+    report.append("")
+
+    overall_status = "PASS"
+    for table in tables or TABLES:
+        report.append(f"## Table: {table}")
+        try:
+            if not verify_table_fingerprints(source_engine, target_engine, table, report):
+                overall_status = "FAIL"
+        except Exception as e:
+            report.append(f"- **Data Integrity**: ERROR ({e})")
+            overall_status = "FAIL"
+
+    report.append("")
+    report.append(f"# OVERALL VERIFICATION: {overall_status}")
+
+    with open("verification_report.md", "w") as f:
+        f.write("\n".join(report))
+
+    print("\n".join(report))
+
+    if overall_status == "FAIL":
+        sys.exit(1)
+
 if __name__ == "__main__":
-    verify_data()
+    parser = argparse.ArgumentParser(description="Verifies the SQLite copy against the MySQL source.")
+    parser.add_argument('--mode', choices=['fingerprint', 'full'], default='fingerprint',
+                        help="Per-partition fingerprints computed in each database (default), or full DataFrame merges")
+    parser.add_argument('--source', default=None, help="SQLAlchemy URL of the source database (default: MYSQL_CONFIG)")
+    parser.add_argument('--tables', nargs='*', default=None, help="Only verify these tables (fingerprint mode)")
+    args = parser.parse_args()
+    if args.mode == 'full':
+        verify_data(args.source)
+    else:
+        verify_fingerprints(args.source, args.tables)